@@ -0,0 +1,66 @@
+import sys
+import json
+import time
+import platform
+import argparse
+from benchmarks import harness, micro, macro
+
+
+def run(args) -> int:
+    results = harness.run(args.filter, args.repeat, args.min_time)
+    if args.output:
+        import numpy
+        import pygame
+        meta = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pygame': pygame.version.ver,
+            'numpy': numpy.__version__,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)['results']
+    with open(args.current, 'r') as f:
+        current = json.load(f)['results']
+    rows = harness.compare(baseline, current, args.threshold)
+    regressions = 0
+    for name, before, after, ratio, regressed in rows:
+        regressions += regressed
+        flag = 'REGRESSION' if regressed else ''
+        print(f"{name:<48}{before:>12.2f}{after:>12.2f} us{ratio:>8.2f}x  {flag}")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Geometric Rain hot-path benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.05,
+                            help='seconds each timed repeat runs for at least')
+    run_parser.add_argument('--output', help='write the results to this json baseline')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='fail on regressions against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='allowed slowdown as a fraction, 0.10 is 10%%')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
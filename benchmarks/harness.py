@@ -0,0 +1,74 @@
+import time
+import statistics
+
+
+BENCHMARKS: dict = {}
+
+
+def benchmark(name: str):
+    """
+    register a benchmark.  the decorated function does any setup and returns
+    the zero-argument callable to be timed
+    :return:
+    """
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark '{name}' registered twice")
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def calibrate(op, min_time: float) -> int:
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        if time.perf_counter() - started >= min_time:
+            return number
+        number *= 2
+
+
+def measure(setup, repeat: int = 5, min_time: float = 0.05) -> dict:
+    op = setup()
+    number = calibrate(op, min_time)
+    per_op = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        per_op.append((time.perf_counter() - started) / number)
+    return {
+        'median_us': statistics.median(per_op) * 1e6,
+        'min_us': min(per_op) * 1e6,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run(pattern: str = '', repeat: int = 5, min_time: float = 0.05, report=print) -> dict:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern not in name:
+            continue
+        results[name] = measure(setup, repeat, min_time)
+        report(f"{name:<48}{results[name]['median_us']:>12.2f} us")
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    (name, baseline_us, current_us, ratio, regressed) for every benchmark in
+    both runs.  compares the fastest repeat, which is the least noisy
+    :return:
+    """
+    rows = []
+    for name in baseline:
+        if name not in current:
+            continue
+        before = baseline[name]['min_us']
+        after = current[name]['min_us']
+        ratio = after / before if before else float('inf')
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
@@ -0,0 +1,131 @@
+import tempfile
+from benchmarks.harness import benchmark
+from geometric_rain.config import Conf
+from geometric_rain.core.game import GameCore, DOWN
+
+
+# games played from a fresh seed are reset well before they can top out,
+# since Game pauses on game over
+RESET_EVERY = 2000
+
+
+class Silent:
+    """
+    stands in for Sound, the benchmarks measure the game, not the mixer
+    """
+    music_state = 'off'
+
+    def __getattr__(self, name):
+        return self
+
+    def play(self, *args):
+        pass
+
+
+_game = None
+_appdata = None
+
+
+def game():
+    """
+    a Game whose journal lives in a temporary folder rather than the
+    player's appdata, and that neither records a replay nor plays itself,
+    so a timed run doesn't touch the score history or grow as it goes
+    :return:
+    """
+    global _game, _appdata
+    if _game is None:
+        from geometric_rain.classes.game import Game
+        from geometric_rain.classes.display import Display
+        from geometric_rain.classes.scores import Scorekeeper
+        _appdata = tempfile.TemporaryDirectory(prefix='geometric_rain_bench_')
+        scorekeeper = Scorekeeper('GeometricRainBenchmark', _appdata.name)
+        display = Display(scorekeeper)
+        settings = Conf.record_replays, Conf.autoplay
+        Conf.record_replays, Conf.autoplay = False, False
+        try:
+            _game = Game(display, Silent(), scorekeeper)
+        finally:
+            Conf.record_replays, Conf.autoplay = settings
+    return _game
+
+
+def fresh_game():
+    current = game()
+    current.core.reset(0)
+    current.rebuild_settled_layer()
+    current.display.invalidate()
+    return current
+
+
+@benchmark('GameCore.step[idle]')
+def core_step_idle():
+    core = GameCore(seed=0)
+    count = [0]
+
+    def op():
+        core.step(0)
+        count[0] += 1
+        if count[0] % RESET_EVERY == 0:
+            core.reset(0)
+    return op
+
+
+@benchmark('GameCore.step[soft drop]')
+def core_step_drop():
+    core = GameCore(seed=0)
+
+    def op():
+        core.step(DOWN)
+        if core.game_over:
+            core.reset(0)
+    return op
+
+
+@benchmark('Game.update')
+def game_update():
+    current = fresh_game()
+    count = [0]
+
+    def op():
+        current.update()
+        count[0] += 1
+        if count[0] % RESET_EVERY == 0:
+            current.core.reset(0)
+            current.rebuild_settled_layer()
+    return op
+
+
+@benchmark('Game.iteration')
+def game_iteration():
+    current = fresh_game()
+    count = [0]
+
+    def op():
+        current.iteration()
+        count[0] += 1
+        if count[0] % RESET_EVERY == 0:
+            current.core.reset(0)
+            current.rebuild_settled_layer()
+    return op
+
+
+@benchmark('Display.render_frame[steady]')
+def render_frame_steady():
+    current = fresh_game()
+    content = current.render()
+    display = current.display
+    display.render_frame(content, current.next_piece, current.pieces)
+    return lambda: display.render_frame(content, current.next_piece, current.pieces)
+
+
+@benchmark('Display.render_frame[full redraw]')
+def render_frame_full():
+    current = fresh_game()
+    content = current.render()
+    display = current.display
+
+    def op():
+        display.invalidate()
+        display.render_frame(content, current.next_piece, current.pieces)
+    return op
@@ -0,0 +1,149 @@
+from random import Random
+from benchmarks.harness import benchmark
+from geometric_rain.config import Conf
+from geometric_rain.core.game import GameCore, BOARD_BACKENDS, make_board
+from geometric_rain.core.pieces import registry
+from geometric_rain.core.search import PlacementSearch
+
+
+STACK_HEIGHTS = (4, 10, 16)
+
+
+def seeded_board(backend: str, stack_height: int, full_rows: int = 0, seed: int = 0):
+    """
+    a board whose bottom stack_height rows are mostly filled, the lowest
+    full_rows of them completely
+    :return:
+    """
+    rng = Random(seed)
+    board = make_board(backend)
+    cells = []
+    for gy in range(board.height - stack_height, board.height):
+        complete = gy >= board.height - full_rows
+        cells += [(gx, gy) for gx in range(board.width) if complete or rng.random() < 0.7]
+    board.place(cells, (128, 128, 128))
+    return board, cells
+
+
+def probes(board, count: int = 100, seed: int = 0) -> list:
+    rng = Random(seed)
+    pieces = registry.pieces
+    return [(rng.choice(pieces).rotations[rng.randrange(4)],
+             rng.randrange(-1, board.width),
+             rng.randrange(0, board.height))
+            for _ in range(count)]
+
+
+for backend in BOARD_BACKENDS:
+
+    @benchmark(f"core.shift[{backend}]")
+    def shift(backend=backend):
+        core = GameCore(board=make_board(backend), seed=0)
+        core.piece.gy = 5
+
+        def op():
+            core.shift(1)
+            core.shift(-1)
+        return op
+
+    @benchmark(f"core.fall[{backend}]")
+    def fall(backend=backend):
+        core = GameCore(board=make_board(backend), seed=0)
+
+        def op():
+            core.piece.gy = 0
+            core.ticks_since_last_fall = core.slow_tick_interval
+            core.maybe_fall()
+        return op
+
+    @benchmark(f"core.rotate[{backend}]")
+    def rotate(backend=backend):
+        core = GameCore(board=make_board(backend), seed=0)
+        core.piece = registry['T'](gy=5)
+
+        def op():
+            core.rotate()
+            core.rotate(-1)
+        return op
+
+    for stack_height in STACK_HEIGHTS:
+
+        @benchmark(f"board.collides_piece x100[{backend}, stack {stack_height}]")
+        def collides(backend=backend, stack_height=stack_height):
+            board, _ = seeded_board(backend, stack_height)
+            checks = probes(board)
+            collides_piece = board.collides_piece
+
+            def op():
+                for rotation, gx, gy in checks:
+                    collides_piece(rotation, gx, gy)
+            return op
+
+        @benchmark(f"board.find_completed_rows[{backend}, stack {stack_height}]")
+        def find_rows(backend=backend, stack_height=stack_height):
+            board, _ = seeded_board(backend, stack_height, full_rows=2)
+            return board.find_completed_rows
+
+        @benchmark(f"board.place+clear_rows[{backend}, stack {stack_height}]")
+        def clear_rows(backend=backend, stack_height=stack_height):
+            board, cells = seeded_board(backend, stack_height, full_rows=4)
+
+            def op():
+                board.reset()
+                board.place(cells, (128, 128, 128))
+                board.clear_rows(board.find_completed_rows())
+            return op
+
+    @benchmark(f"observe[{backend}]")
+    def observe(backend=backend):
+        from geometric_rain.core.observe import Observation
+        core = GameCore(board=make_board(backend), seed=0)
+        observation = Observation(core)
+
+        def op():
+            # a step that settles a piece, so the board is copied out again
+            core.piece.gy = core.board.height - 2
+            core.ticks_since_last_fall = core.slow_tick_interval
+            core.maybe_fall()
+            observation.update()
+            core.board.reset()
+        return op
+
+
+for stack_height in STACK_HEIGHTS:
+
+    @benchmark(f"search.best[T, stack {stack_height}]")
+    def search_best(stack_height=stack_height):
+        board, _ = seeded_board('bitboard', stack_height)
+        rows = board.occupancy()
+        search = PlacementSearch()
+        piece_type = registry['T']
+        start = (0, piece_type.spawn_x, 0)
+
+        def op():
+            # a fresh search each time, not a transposition table hit
+            search.scores.clear()
+            search.placement_cache.clear()
+            return search.best(rows, board.width, piece_type, start)
+        return op
+
+
+@benchmark('atlas.block[cold]')
+def block_cold():
+    from geometric_rain.classes.textures import TextureAtlas
+    atlas = TextureAtlas()
+    block_size = 32
+
+    def op():
+        atlas.blocks.clear()
+        atlas.block(Conf.pieces['T']['color'], block_size)
+    return op
+
+
+@benchmark('atlas.block[cached]')
+def block_cached():
+    from geometric_rain.classes.textures import TextureAtlas
+    atlas = TextureAtlas()
+    color = Conf.pieces['T']['color']
+    atlas.block(color, 32)
+    return lambda: atlas.block(color, 32)
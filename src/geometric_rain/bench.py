@@ -0,0 +1,205 @@
+import sys
+import json
+import time
+import argparse
+import importlib
+import statistics
+from random import Random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from geometric_rain.core.game import GameCore, LEFT, RIGHT, UP, DOWN
+from geometric_rain.core.replay import load_log, verify
+from geometric_rain.core.search import Autoplayer
+from geometric_rain.core.lookahead import BeamPlanner, LookaheadPlayer
+
+
+# a policy is a factory taking the game's seed and returning a callable
+# that maps a GameCore to the input bits for its next tick
+
+def idle_policy(seed: int):
+    return lambda core: 0
+
+
+def drop_policy(seed: int):
+    return lambda core: DOWN
+
+
+def random_policy(seed: int):
+    rng = Random(seed)
+    actions = (0, 0, 0, LEFT, RIGHT, UP, DOWN)
+    return lambda core: rng.choice(actions)
+
+
+def autoplay_policy(seed: int):
+    return Autoplayer()
+
+
+def lookahead_policy(seed: int):
+    # games already run one per worker process, and an unlimited budget
+    # keeps results independent of machine load
+    return LookaheadPlayer(BeamPlanner(workers=0, time_budget=float('inf')))
+
+
+POLICIES = {
+    'idle': idle_policy,
+    'drop': drop_policy,
+    'random': random_policy,
+    'autoplay': autoplay_policy,
+    'lookahead': lookahead_policy,
+}
+
+
+def load_policy(spec: str):
+    """
+    a built-in policy name, or 'package.module:factory' for anything else
+    :return:
+    """
+    if spec in POLICIES:
+        return POLICIES[spec]
+    module_name, sep, attr = spec.partition(':')
+    if not sep:
+        raise ValueError(f"Unknown policy '{spec}', expected one of {sorted(POLICIES)} or 'module:factory'")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# one core and one set of resolved policies per worker process, reused
+# for every game that worker plays
+_core: GameCore | None = None
+_policies: dict = {}
+
+
+def _init_worker():
+    global _core
+    _core = GameCore()
+
+
+def play_game(policy_spec: str, seed: int, max_ticks: int) -> dict:
+    if _core is None:
+        _init_worker()
+    if policy_spec not in _policies:
+        _policies[policy_spec] = load_policy(policy_spec)
+    core = _core
+    core.reset(seed)
+    policy = _policies[policy_spec](seed)
+
+    started = time.perf_counter()
+    while not core.game_over and core.ticks < max_ticks:
+        core.step(policy(core))
+    seconds = time.perf_counter() - started
+
+    result = {
+        'policy': policy_spec,
+        'seed': seed,
+        'score': core.score.current_score,
+        'lines': core.score.total_rows_cleared,
+        'level': core.score.current_level,
+        'pieces': sum(core.score.stats.values()),
+        'ticks': core.ticks,
+        'seconds': seconds,
+        'ticks_per_second': core.ticks / seconds if seconds else 0.0,
+        'topped_out': core.game_over,
+    }
+    # searching policies report their transposition table hit rates
+    stats = getattr(policy, 'stats', None)
+    if stats is not None:
+        result['search'] = stats()
+    return result
+
+
+def confidence_interval(values: list, z: float = 1.96) -> tuple:
+    """
+    mean and the half-width of its normal-approximation confidence interval
+    :return:
+    """
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, 0.0
+    return mean, z * statistics.stdev(values) / len(values) ** 0.5
+
+
+def summarize(results: list) -> str:
+    columns = ('score', 'lines', 'level', 'pieces', 'ticks_per_second')
+    header = f"{'policy':<16}{'games':>6}" + ''.join(f"{column:>24}" for column in columns)
+    lines = [header, '-' * len(header)]
+    for policy in sorted({result['policy'] for result in results}):
+        games = [result for result in results if result['policy'] == policy]
+        row = f"{policy:<16}{len(games):>6}"
+        for column in columns:
+            mean, half_width = confidence_interval([game[column] for game in games])
+            row += f"{f'{mean:.1f} ± {half_width:.1f}':>24}"
+        lines.append(row)
+    return '\n'.join(lines)
+
+
+def tournament(args) -> list:
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(play_game, policy, seed, args.max_ticks)
+                   for policy in args.policies
+                   for seed in seeds]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"{result['policy']:<16} seed {result['seed']:<6} "
+                  f"score {result['score']:<8} lines {result['lines']:<5} "
+                  f"level {result['level']:<3} pieces {result['pieces']:<6} "
+                  f"{result['ticks_per_second']:,.0f} ticks/s", flush=True)
+    print()
+    print(summarize(results))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def replay(args) -> list:
+    """
+    replay recorded games headlessly and check each ends with the score it
+    recorded, each under the rules it was played by; exits non-zero if any
+    of them doesn't
+    :return:
+    """
+    mismatched = []
+    for filepath in args.replays:
+        log = load_log(filepath)
+        started = time.perf_counter()
+        matched, core = verify(log)
+        seconds = time.perf_counter() - started
+        score = core.score
+        print(f"{'ok' if matched else 'MISMATCH':<10}{filepath}  seed {log.seed}  "
+              f"score {score.current_score}/{log.score}  lines {score.total_rows_cleared}/{log.rows}  "
+              f"level {score.current_level}/{log.level}  {log.ticks} ticks in {seconds:.3f}s", flush=True)
+        if not matched:
+            mismatched.append(filepath)
+    if mismatched:
+        sys.exit(1)
+    return mismatched
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(prog='python -m geometric_rain.bench',
+                                     description='Headless benchmarks for Geometric Rain')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    tournament_parser = commands.add_parser('tournament', help='play every policy against the same seeds')
+    tournament_parser.add_argument('--policies', nargs='+', default=['random'],
+                                   help=f"built-in ({', '.join(POLICIES)}) or 'module:factory'")
+    tournament_parser.add_argument('--seeds', type=int, default=16, help='games per policy')
+    tournament_parser.add_argument('--first-seed', type=int, default=0)
+    tournament_parser.add_argument('--workers', type=int, default=None,
+                                   help='worker processes, defaults to the cpu count')
+    tournament_parser.add_argument('--max-ticks', type=int, default=1_000_000,
+                                   help='stop a game that has not topped out after this many ticks')
+    tournament_parser.add_argument('--json', help='also write every game result to this file')
+    tournament_parser.set_defaults(func=tournament)
+
+    replay_parser = commands.add_parser('replay', help='verify recorded games by replaying their inputs')
+    replay_parser.add_argument('replays', nargs='+', help='.grr replays saved in the appdata replays folder, or bare .gril input logs')
+    replay_parser.set_defaults(func=replay)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,146 @@
+import os
+import time
+import pygame
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from geometric_rain.config import Conf
+
+
+
+class AssetManager:
+    """
+    loads sounds and opens music on a small thread pool.  prefetch() queues a
+    load and returns straight away; sound() and music() return the loaded asset,
+    waiting for a prefetch still in flight or loading it on the spot if
+    nothing asked for it yet.  the mixer is opened on the pool too, ahead of
+    the first sound, so none of it holds up the first frame.
+
+    fonts are loaded on first use and cached, but on the calling thread:
+    freetype isn't safe to use from two threads while the main one draws
+    text.  how long each load took is kept in self.timings
+    """
+
+    def __init__(self, workers: int = None):
+        self.pool = ThreadPoolExecutor(max_workers=workers or Conf.asset_workers,
+                                       thread_name_prefix='assets')
+        self.futures: dict = {}
+        self.timings: dict = {}
+        self.lock = Lock()
+        self.mixer = None
+        self.fonts: dict = {}
+
+    def _submit(self, key: tuple, loader, name: str):
+        with self.lock:
+            future = self.futures.get(key)
+            if future is None:
+                future = self.futures[key] = self.pool.submit(self._timed, key, loader, name)
+            return future
+
+    def _timed(self, key: tuple, loader, *args):
+        started = time.perf_counter()
+        asset = loader(*args)
+        self.timings[key] = time.perf_counter() - started
+        return asset
+
+    def init_mixer(self):
+        """
+        open the audio device in the background; sound loads wait on it
+        :return:
+        """
+        with self.lock:
+            if self.mixer is None:
+                self.mixer = self.pool.submit(self._timed, ('mixer', 'init'), pygame.mixer.init)
+        return self.mixer
+
+    def prefetch(self, kind: str, name: str):
+        loaders = {
+            'sound': self._load_sound,
+            'music': self._load_music,
+        }
+        if kind not in loaders:
+            raise ValueError(f"Unknown asset kind '{kind}', expected one of {sorted(loaders)}")
+        return self._submit((kind, name), loaders[kind], name)
+
+    def sound(self, name: str) -> pygame.mixer.Sound:
+        return self.prefetch('sound', name).result()
+
+    def music(self, name: str) -> str:
+        return self.prefetch('music', name).result()
+
+    def font(self, filepath: str | None, size: int) -> pygame.font.Font:
+        key = ('font', filepath, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = self._timed(key, pygame.font.Font, filepath, size)
+        return font
+
+    def _load_sound(self, name: str) -> pygame.mixer.Sound:
+        self.init_mixer().result()
+        return load_sound(name)
+
+    def _load_music(self, name: str) -> str:
+        self.init_mixer().result()
+        return load_music(name)
+
+    def report(self) -> list:
+        """
+        (name, seconds) per load, slowest first
+        :return:
+        """
+        return sorted(((':'.join(os.path.basename(str(part)) for part in key), seconds)
+                       for key, seconds in self.timings.items()),
+                      key=lambda item: item[1], reverse=True)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def asset_conf(asset_name: str, music: bool = False) -> tuple:
+    """
+    the asset's entry in Conf.sounds or Conf.music and the path to its file
+    :return: (conf, filepath)
+    """
+    if music:
+        conf = Conf.music.get(asset_name)
+        asset_path = Conf.music_assets
+        noun = 'music'
+    else:
+        conf = Conf.sounds.get(asset_name)
+        asset_path = Conf.sound_assets
+        noun = 'sound'
+
+    if not conf:
+        raise ValueError(f"{noun.title()} conf for asset '{asset_name}' not found in config.py")
+
+    filename = conf.get('filename')
+    if not filename:
+        raise ValueError(f"{noun.title()} asset '{asset_name}' had no 'filename' attribute in config.py")
+    return conf, f"{asset_path}/{filename}"
+
+
+def load_sound(asset_name: str) -> pygame.mixer.Sound:
+    conf, asset_filepath = asset_conf(asset_name)
+    try:
+        asset = pygame.mixer.Sound(asset_filepath)
+    except pygame.error as e:
+        raise pygame.error(f"Error loading sound asset '{asset_name}' ({asset_filepath}): {e}")
+    asset.set_volume(conf.get('volume', 0.6))
+    return asset
+
+
+def load_music(asset_name: str) -> str:
+    """
+    open the track for streaming through pygame.mixer.music; only a small
+    decode buffer is ever resident, rather than the whole track as a Sound
+    :return:
+    """
+    conf, asset_filepath = asset_conf(asset_name, music=True)
+    try:
+        pygame.mixer.music.load(asset_filepath)
+    except pygame.error as e:
+        raise pygame.error(f"Error loading music asset '{asset_name}' ({asset_filepath}): {e}")
+    pygame.mixer.music.set_volume(conf.get('volume', 0.6))
+    return asset_filepath
+
+
+assets = AssetManager()
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import shlex
+import struct
+import threading
+import subprocess
+import zlib
+from collections import deque
+import numpy as np
+import pygame
+from geometric_rain.config import Conf
+
+
+CAPTURE_MODES = ('raw', 'png', 'pipe')
+DROP_POLICIES = ('newest', 'oldest')
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(data, zlib.crc32(kind)))
+
+
+def encode_png(frame: np.ndarray, level: int = None) -> bytes:
+    """
+    an rgb frame of shape (height, width, 3) as a png.  pygame.image.save
+    holds the gil for the whole encode, which would stall the game loop from
+    a background thread; zlib lets go of it while it compresses
+    :return:
+    """
+    height, width, _ = frame.shape
+    # every scanline starts with its filter type, 0 for none
+    scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = frame.reshape(height, width * 3)
+    level = Conf.capture_png_level if level is None else level
+    return (b'\x89PNG\r\n\x1a\n'
+            + png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + png_chunk(b'IDAT', zlib.compress(scanlines, level))
+            + png_chunk(b'IEND', b''))
+
+
+class FrameCapture:
+    """
+    records presented frames without holding up the loop presenting them.
+    capture() copies the surface's pixels as they are, one memcpy, into the
+    next free slot of a ring allocated up front, and a writer thread turns
+    each into rgb and writes it out: appended to one raw rgb24 file, as a
+    numbered png, or down a pipe into Conf.capture_command.
+
+    when every slot is still waiting to be written, drop 'newest' skips the
+    frame being captured and 'oldest' takes over the longest-waiting one.
+    either way it's counted in dropped, and if the writer fails every frame
+    after is dropped too, so captured is always written + dropped + pending,
+    and pending is empty once closed.  a capture.json next to the output
+    records the frame size and when each written frame was shown
+    """
+
+    def __init__(self, surface: pygame.Surface, mode: str = None, path: str = None, buffer_frames: int = None,
+                 drop: str = None):
+        self.mode: str = mode or Conf.capture_mode
+        if self.mode not in CAPTURE_MODES:
+            raise ValueError(f"Unknown capture mode '{self.mode}', expected one of {', '.join(CAPTURE_MODES)}")
+        self.drop: str = drop or Conf.capture_drop
+        if self.drop not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{self.drop}', expected one of {', '.join(DROP_POLICIES)}")
+        self.path: str = path or Conf.capture_path
+        os.makedirs(self.path, exist_ok=True)
+
+        self.size: tuple = surface.get_size()
+        self.pitch: int = surface.get_pitch()
+        self.bytesize: int = surface.get_bytesize()
+        if self.bytesize not in (3, 4):
+            raise ValueError(f"Can't capture a {surface.get_bitsize()}-bit surface")
+        # the byte of each pixel that holds red, green and blue
+        self.channels: list = []
+        for mask in surface.get_masks()[:3]:
+            byte = ((mask & -mask).bit_length() - 1) // 8
+            self.channels.append(byte if sys.byteorder == 'little' else self.bytesize - 1 - byte)
+
+        buffer_frames = buffer_frames or Conf.capture_buffer_frames
+        self.slots = np.empty((buffer_frames, self.size[1] * self.pitch), dtype=np.uint8)
+        self.free = deque(range(buffer_frames))
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.closing = False
+        self.error = None
+        self.captured: int = 0
+        self.written: int = 0
+        self.dropped: int = 0
+        self.shown_ms: list = []
+
+        self.output = None
+        self.process = None
+        width, height = self.size
+        if self.mode == 'raw':
+            self.output = open(os.path.join(self.path, 'frames.rgb'), 'wb')
+        elif self.mode == 'pipe':
+            fps = Conf.max_fps or Conf.tick_rate
+            command = [arg.format(width=width, height=height, fps=fps, path=self.path)
+                       for arg in shlex.split(Conf.capture_command)]
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+            self.output = self.process.stdin
+        self.thread = threading.Thread(target=self._write_frames, name='frame-capture', daemon=True)
+        self.thread.start()
+
+    def capture(self, surface: pygame.Surface, shown_ms: int = None) -> bool:
+        """
+        queue the surface's current pixels to be written
+        :return: False if the frame was dropped
+        """
+        with self.condition:
+            self.captured += 1
+            if self.error is not None or self.closing:
+                self.dropped += 1
+                return False
+            if self.free:
+                slot = self.free.popleft()
+            elif self.drop == 'oldest' and self.pending:
+                slot, _ = self.pending.popleft()
+                self.dropped += 1
+            else:
+                self.dropped += 1
+                return False
+        self.slots[slot] = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+        with self.condition:
+            # the writer may have failed or finished while the copy was made,
+            # and nothing would ever take the frame off pending
+            if self.error is not None or self.closing:
+                self.free.append(slot)
+                self.dropped += 1
+                return False
+            self.pending.append((slot, pygame.time.get_ticks() if shown_ms is None else shown_ms))
+            self.condition.notify()
+        return True
+
+    def rgb(self, slot: int) -> np.ndarray:
+        width, height = self.size
+        pixels = self.slots[slot].reshape(height, self.pitch)[:, :width * self.bytesize]
+        return np.ascontiguousarray(pixels.reshape(height, width, self.bytesize)[:, :, self.channels])
+
+    def _write_frames(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closing:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                slot, shown_ms = self.pending.popleft()
+            frame = self.rgb(slot)
+            with self.condition:
+                self.free.append(slot)
+            try:
+                self.write(frame)
+            except Exception as error:
+                with self.condition:
+                    self.error = error
+                    self.dropped += 1 + len(self.pending)
+                    self.free.extend(slot for slot, _ in self.pending)
+                    self.pending.clear()
+                return
+            self.shown_ms.append(shown_ms)
+            self.written += 1
+
+    def write(self, frame: np.ndarray):
+        if self.mode == 'png':
+            with open(os.path.join(self.path, f"frame_{self.written:06d}.png"), 'wb') as file:
+                file.write(encode_png(frame))
+        else:
+            self.output.write(frame)
+
+    def stats(self) -> dict:
+        return {
+            'captured': self.captured,
+            'written': self.written,
+            'dropped': self.dropped,
+            'pending': len(self.pending),
+        }
+
+    def close(self) -> dict:
+        """
+        write out whatever is still queued, then close the output.  anything
+        the writer left behind is counted as dropped
+        :return:
+        """
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join()
+        with self.condition:
+            self.dropped += len(self.pending)
+            self.free.extend(slot for slot, _ in self.pending)
+            self.pending.clear()
+        if self.output is not None:
+            try:
+                self.output.close()
+            except OSError as error:
+                self.error = self.error or error
+        if self.process is not None:
+            self.process.wait()
+        width, height = self.size
+        with open(os.path.join(self.path, 'capture.json'), 'w') as file:
+            json.dump({
+                'mode': self.mode,
+                'width': width,
+                'height': height,
+                'pixel_format': 'rgb24',
+                **self.stats(),
+                'error': None if self.error is None else str(self.error),
+                'shown_ms': self.shown_ms,
+            }, file)
+        return self.stats()
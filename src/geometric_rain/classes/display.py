@@ -1,6 +1,9 @@
 import pygame
 from geometric_rain.config import Conf
 from geometric_rain.classes.scores import Scorekeeper
+from geometric_rain.classes.textures import atlas
+from geometric_rain.classes.assets import assets
+from geometric_rain.classes.text import GlyphStrip, text_cache
 
 
 
@@ -55,6 +58,10 @@ class Panel:
 
         self.pos = (self.margin_left, self.margin_top)
         self.size = (self.w, self.h)
+        self.rect = pygame.Rect(self.pos, self.size)
+        self.content_rect = pygame.Rect((self.margin_left + self.border_width * 3,
+                                         self.margin_top + self.border_width * 3),
+                                        (self.content_w, self.content_h))
 
     def generate_content(self) -> pygame.Surface:
         surface = pygame.Surface((self.content_w, self.content_h))
@@ -77,7 +84,10 @@ class Display:
                  scorekeeper: Scorekeeper,
                  display_mode: str = 'windowed'):
 
-        pygame.init()
+        # only what the window needs; the mixer is opened in the background
+        # by the asset manager
+        pygame.display.init()
+        pygame.font.init()
         pygame.display.set_caption("Geometric Rain")
         self.display_mode = display_mode
         self.scorekeeper = scorekeeper
@@ -154,15 +164,45 @@ class Display:
 
         font_scale = 0.02504472271914
         self.font_size = int(round(self.content_area_width * font_scale, 0))
-        self.font = pygame.font.Font(Conf.font_filepath, self.font_size)
-        self.stats_font = pygame.font.Font(Conf.font_filepath, int(self.block_size * 1))
+        self.font = assets.font(Conf.font_filepath, self.font_size)
+        self.stats_font = assets.font(Conf.font_filepath, int(self.block_size * 1))
+        self.text_cache = text_cache
+        self.digits = GlyphStrip(self.font, Conf.text_color)
+        self.stats_digits = GlyphStrip(self.stats_font, Conf.stats_text_color)
+
+        # retained mode: each panel is only rebuilt when the values it shows
+        # change, and only the rects that changed are pushed to the screen
+        self.content_pos = self.content.get_rect(center=self.frame.get_rect().center).topleft
+        self.panel_keys: dict = {}
+        self.dirty_rects: list = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """
+        forget every cached panel so the next frame is redrawn and flipped in full,
+        for when something else has drawn over the frame
+        :return:
+        """
+        self.full_redraw = True
+
+    def _panel_changed(self, panel: Panel, key) -> bool:
+        if panel in self.panel_keys and self.panel_keys[panel] == key:
+            return False
+        self.panel_keys[panel] = key
+        self.dirty_rects.append(panel.rect)
+        return True
 
     def _render_content(self, content: pygame.Surface):
-        game_area_surface = self.game_panel.add_border(content)
-        self.content.blit(game_area_surface, self.game_panel.pos)
+        if self._panel_changed(self.game_panel, 'border'):
+            game_area_surface = self.game_panel.add_border(self.game_panel.generate_content())
+            self.content.blit(game_area_surface, self.game_panel.pos)
+        self.content.blit(content, self.game_panel.content_rect)
+        self.dirty_rects.append(self.game_panel.content_rect)
 
     def render_frame(self, content: pygame.Surface, next_piece, pieces):
-        self.content.fill(Conf.content_background_color)
+        if self.full_redraw:
+            self.content.fill(Conf.content_background_color)
+            self.panel_keys.clear()
         self.render_stats_panel(pieces)
         self.render_lines_panel()
         self.render_score_panel()
@@ -170,18 +210,29 @@ class Display:
         self.render_current_level_panel()
         self._render_content(content)
         self._render_frame()
-        pygame.display.flip()
 
     def _render_frame(self):
-        frame_rect = self.frame.get_rect()
-        center_pos = self.content.get_rect(center=frame_rect.center)
-        self.frame.blit(self.content, center_pos)
+        if self.full_redraw:
+            self.frame.blit(self.content, self.content_pos)
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            screen_rects = []
+            for rect in self.dirty_rects:
+                screen_rect = rect.move(self.content_pos)
+                self.frame.blit(self.content, screen_rect, area=rect)
+                screen_rects.append(screen_rect)
+            pygame.display.update(screen_rects)
+        self.dirty_rects.clear()
 
     def render_stats_panel(self, pieces):
+        key = tuple((piece.name, self.scorekeeper.stats[piece.name]) for piece in pieces)
+        if not self._panel_changed(self.stats_panel, key):
+            return
         stats_area_surface = self.stats_panel.generate_content()
         stats_area_surface = self.stats_panel.add_border(stats_area_surface)
         stats_area_rect = stats_area_surface.get_rect()
-        stats_title = self.font.render("SHAPE COUNTS", True, Conf.text_color)
+        stats_title = self.text_cache.render(self.font, "SHAPE COUNTS", True, Conf.text_color)
         title_rect = stats_title.get_rect(center=stats_area_rect.center)
         stats_area_surface.blit(stats_title, (title_rect.x, 12))
 
@@ -198,12 +249,10 @@ class Display:
         for i, piece in enumerate(pieces):
 
             count = self.scorekeeper.stats[piece.name]
-            count_text = self.stats_font.render(f"{count:03d}",
-                                         True, Conf.stats_text_color)
 
-            dummy_piece = piece(None, self, inert=True, spawn_x=0)
-            dummy_piece.rotate(half_turn=True)
-            piece_width, piece_height = dummy_piece.pw, dummy_piece.ph
+            thumbnail = atlas.thumbnail(piece, self.block_size, rotation=2)
+            piece_width = piece.gw * self.block_size
+            piece_height = piece.gh * self.block_size
 
             if piece.name in ('T', 'J', 'L', 'S', 'Z'):
                 extra_margin_right = self.block_size//2
@@ -217,10 +266,10 @@ class Display:
             elif piece.name == 'I':
                 margin_top -= self.block_size
                 text_top_margin -= self.block_size - 6
-            for block in dummy_piece:
-                stats_area_surface.blit(block.image, (block.rect.left + inner_centerline - piece_width - extra_margin_right,
-                                                      block.rect.top + margin_top))
-            stats_area_surface.blit(count_text, (inner_centerline + 6, text_top_margin))
+            stats_area_surface.blit(thumbnail, (inner_centerline - piece_width - extra_margin_right,
+                                                margin_top))
+            self.stats_digits.render(stats_area_surface, f"{count:03d}",
+                                     (inner_centerline + 6, text_top_margin))
             margin_top += piece_height + spaces
             text_top_margin += piece_height + spaces
             if piece.name == 'O':
@@ -229,71 +278,82 @@ class Display:
         self.content.blit(stats_area_surface, self.stats_panel.pos)
 
     def render_lines_panel(self):
+        if not self._panel_changed(self.lines_panel, self.scorekeeper.total_rows_cleared):
+            return
         lines_header_surface = self.lines_panel.generate_content()
         lines_header_surface = self.lines_panel.add_border(lines_header_surface)
         lines_header_rect = lines_header_surface.get_rect()
-        lines_title = self.font.render(f"ROWS {self.scorekeeper.total_rows_cleared:03d}",
-                                       True, Conf.text_color)
-        title_rect = lines_title.get_rect(center=lines_header_rect.center)
+        lines_title = self.text_cache.render(self.font, "ROWS ", True, Conf.text_color)
+        lines_count = f"{self.scorekeeper.total_rows_cleared:03d}"
+        count_w, count_h = self.digits.size(lines_count)
+        title_rect = pygame.Rect(0, 0, lines_title.get_width() + count_w,
+                                 max(lines_title.get_height(), count_h))
+        title_rect.center = lines_header_rect.center
         lines_header_surface.blit(lines_title, title_rect)
+        self.digits.render(lines_header_surface, lines_count,
+                           (title_rect.x + lines_title.get_width(), title_rect.y))
         self.content.blit(lines_header_surface, self.lines_panel.pos)
 
     def render_score_panel(self):
+        key = (self.scorekeeper.top_score, self.scorekeeper.current_score)
+        if not self._panel_changed(self.scores_panel, key):
+            return
         score_area_surface = self.scores_panel.generate_content()
         score_area_surface = self.scores_panel.add_border(score_area_surface)
         score_area_rect = score_area_surface.get_rect()
         thirds = score_area_rect.height // 3
 
-        top_score_title = self.font.render("HIGH", True, Conf.text_color)
+        top_score_title = self.text_cache.render(self.font, "HIGH", True, Conf.text_color)
         top_score_title_margin_top = thirds - self.font_size - 6
         score_area_surface.blit(top_score_title, (12, top_score_title_margin_top))
 
-        top_score = self.font.render(f"{self.scorekeeper.top_score:06d}",
-                                     True, Conf.text_color)
-        score_area_surface.blit(top_score, (12, thirds + 2 - 6))
+        self.digits.render(score_area_surface, f"{self.scorekeeper.top_score:06d}",
+                           (12, thirds + 2 - 6))
 
-        current_score_title = self.font.render("POINTS", True, Conf.text_color)
+        current_score_title = self.text_cache.render(self.font, "POINTS", True, Conf.text_color)
         current_score_title_margin_top = thirds * 2 - self.font_size + 6
         score_area_surface.blit(current_score_title,
                                 (12, current_score_title_margin_top))
 
-        current_score = self.font.render(str(self.scorekeeper.current_score),
-                                         True, Conf.text_color)
         current_score_margin_top = thirds * 2 + 6
-        score_area_surface.blit(current_score, (12, current_score_margin_top + 2))
+        self.digits.render(score_area_surface, str(self.scorekeeper.current_score),
+                           (12, current_score_margin_top + 2))
         self.content.blit(score_area_surface, self.scores_panel.pos)
 
     def render_next_piece_panel(self, next_piece):
+        if not self._panel_changed(self.next_piece_panel, next_piece.name):
+            return
         next_piece_surface = self.next_piece_panel.generate_content()
-        next_piece = next_piece(None, self, inert=True, spawn_x=0)
+        thumbnail = atlas.thumbnail(next_piece, self.block_size)
 
-        piece_width = next_piece.pw
-        piece_height = next_piece.ph
+        piece_width = next_piece.gw * self.block_size
+        piece_height = next_piece.gh * self.block_size
         margin_left = (self.next_piece_panel.content_w - piece_width) // 2
         margin_top = ((self.next_piece_panel.content_h - self.font_size) // 2) - (piece_height // 2)
 
-        for block in next_piece:
-            next_piece_surface.blit(block.image, (block.rect.left + margin_left,
-                                                  block.rect.bottom - margin_top))
+        next_piece_surface.blit(thumbnail, (margin_left,
+                                            self.block_size - margin_top))
 
         next_piece_surface = self.next_piece_panel.add_border(next_piece_surface)
         next_piece_surface_rect = next_piece_surface.get_rect()
 
-        next_piece_title = self.font.render("ON DECK", True, Conf.text_color)
+        next_piece_title = self.text_cache.render(self.font, "ON DECK", True, Conf.text_color)
         title_rect = next_piece_title.get_rect(center=next_piece_surface_rect.center)
         next_piece_surface.blit(next_piece_title, (title_rect.x + 2, 8))
         self.content.blit(next_piece_surface, self.next_piece_panel.pos)
 
     def render_current_level_panel(self):
+        if not self._panel_changed(self.current_level_panel, self.scorekeeper.current_level):
+            return
         current_level_surface = self.current_level_panel.generate_content()
         current_level_surface = self.current_level_panel.add_border(current_level_surface)
         current_level_rect = current_level_surface.get_rect()
-        current_level_title = self.font.render("LEVEL", True, Conf.text_color)
+        current_level_title = self.text_cache.render(self.font, "LEVEL", True, Conf.text_color)
         title_rect = current_level_title.get_rect(center=current_level_rect.center)
         current_level_surface.blit(current_level_title, (title_rect.x, 8))
 
-        current_level = self.font.render(str(self.scorekeeper.current_level),
-                                         True, Conf.text_color)
-        title_rect = current_level.get_rect(center=current_level_rect.center)
-        current_level_surface.blit(current_level, (title_rect.x, 12 + self.font_size))
+        current_level = str(self.scorekeeper.current_level)
+        title_rect = pygame.Rect((0, 0), self.digits.size(current_level))
+        title_rect.center = current_level_rect.center
+        self.digits.render(current_level_surface, current_level, (title_rect.x, 12 + self.font_size))
         self.content.blit(current_level_surface, self.current_level_panel.pos)
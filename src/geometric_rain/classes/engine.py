@@ -1,42 +1,217 @@
+import time
 import pygame
 from geometric_rain.classes.game import Game
 from geometric_rain.classes.menu import Menu
 from geometric_rain.classes.sound import Sound
 from geometric_rain.classes.display import Display
 from geometric_rain.classes.scores import Scorekeeper
+from geometric_rain.classes.text import text_cache
+from geometric_rain.classes.assets import assets
+from geometric_rain.core.profiler import Profiler
+from geometric_rain.config import Conf
 
 
 
 class Engine:
 
     def __init__(self, game_name: str):
+        self.started_ns = time.perf_counter_ns()
+        self.startup: list = []
+        self.profiler = Profiler() if Conf.profiling else None
         self.game_choice = None
-        self.scorekeeper = Scorekeeper(game_name)
-        self.display = Display(self.scorekeeper)
-        self.sound = Sound()
-        self.menu = Menu(self.display)
-        self.game = Game(self.display, self.sound, self.scorekeeper)
+        self.scorekeeper = self.startup_phase('scorekeeper', Scorekeeper, game_name)
+        self.display = self.startup_phase('display', Display, self.scorekeeper)
+        self.sound = self.startup_phase('sound', Sound)
+        self.menu = self.startup_phase('menu', Menu, self.display)
+        self.game = self.startup_phase('game', Game, self.display, self.sound, self.scorekeeper)
         self.loop = self.game
         self.state = 'game'
         self.running = True
+        self.tick_seconds = 1.0 / Conf.tick_rate
+        self.ticks = 0
+        self.frames = 0
+        self.dropped_ticks = 0
+
+        self.overlay = None
+        self.overlay_updated = 0.0
+        self.capture = None
+        if Conf.capture:
+            from geometric_rain.classes.capture import FrameCapture
+            self.capture = FrameCapture(self.display.frame)
+        # called with each applied key press's latency in ms, from the key
+        # going down to the first frame showing its effect being flipped.
+        # without event timestamps "going down" is when the press was polled,
+        # and the profiler files it under poll-to-photon latency instead
+        self.latency_hooks: list = []
+        if self.profiler:
+            self.instrument()
+            self.latency_hooks.append(self.record_input_latency)
+
+    def startup_phase(self, name: str, build, *args):
+        start_ns = time.perf_counter_ns()
+        built = build(*args)
+        self.startup.append((name, start_ns, time.perf_counter_ns()))
+        return built
+
+    def report_startup(self):
+        """
+        print how long each phase took to get the first frame on screen, then
+        the asset loads, which carry on in the background
+        :return:
+        """
+        print(f"First frame in {(self.startup[-1][2] - self.started_ns) / 1e6:.1f} ms")
+        for name, start_ns, end_ns in self.startup:
+            print(f"  {name:<24}{(end_ns - start_ns) / 1e6:8.1f} ms")
+            if self.profiler:
+                self.profiler.record(f"startup.{name}", start_ns, end_ns)
+        pending = sum(not future.done() for future in assets.futures.values())
+        print(f"Assets ({pending} still loading)")
+        for name, seconds in assets.report():
+            print(f"  {name:<24}{seconds * 1e3:8.1f} ms")
+
+    def instrument(self):
+        profiler = self.profiler
+        profiler.instrument(self.game, ('event_loop', 'key_check', 'handle_events'))
+        profiler.instrument(self.game, ('render',), prefix='Game.')
+        profiler.instrument(self.game.core, ('maybe_fall', 'process_completed_rows'))
+        profiler.instrument(self.display, ('render_stats_panel',
+                                           'render_lines_panel',
+                                           'render_score_panel',
+                                           'render_next_piece_panel',
+                                           'render_current_level_panel',
+                                           '_render_content'), prefix='Display.')
+        self.display._render_frame = profiler.wrap('display.flip', self.display._render_frame)
+        if self.capture is not None:
+            self.capture.capture = profiler.wrap('capture', self.capture.capture)
+        self.overlay_font = assets.font(Conf.font_filepath, 8)
+
+    def record_input_latency(self, latency_ms: int):
+        end_ns = time.perf_counter_ns()
+        name = 'input latency' if self.loop.event_timestamps else 'poll-to-photon latency'
+        self.profiler.record(name, end_ns - latency_ms * 1_000_000, end_ns)
+
+    def report_input_latency(self):
+        shown_ms = pygame.time.get_ticks()
+        for pressed_ms in self.loop.applied_inputs:
+            for hook in self.latency_hooks:
+                hook(shown_ms - pressed_ms)
+        self.loop.applied_inputs.clear()
+
+    def wait_for_frame(self):
+        """
+        sleep off the rest of the frame Conf.max_fps allows, polling events
+        every Conf.input_poll_ms along the way so presses get stamped close
+        to when they happened, then let the clock take the last few ms
+        :return:
+        """
+        if Conf.max_fps and Conf.input_poll_ms:
+            deadline = self.frame_ticked + 1.0 / Conf.max_fps
+            poll_seconds = Conf.input_poll_ms / 1000
+            while deadline - time.perf_counter() > poll_seconds:
+                time.sleep(poll_seconds)
+                self.loop.poll_events()
+        self.loop.clock.tick(Conf.max_fps)
+        self.frame_ticked = time.perf_counter()
 
     def set_state(self, new_state):
         self.state = new_state
         self.loop = self.game if new_state == 'game' else self.menu
 
+    def render_paused(self):
+        text = text_cache.render(assets.font(None, 74), 'PAUSED', True, (255, 255, 255))
+        self.display.frame.blit(text, (400 - text.get_width() // 2, 300 - text.get_height() // 2))
+        pygame.display.flip()
+        self.display.invalidate()
+
+    def render_overlay(self):
+        if not self.game.show_overlay:
+            if self.overlay is not None:
+                self.overlay = None
+                self.display.invalidate()
+            return
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_updated >= Conf.profile_overlay_refresh:
+            self.overlay_updated = now
+            lines = [f"{'phase':<28}{'p50':>7}{'p95':>7}{'p99':>7}"]
+            lines += [f"{name[:27]:<28}{p50:7.2f}{p95:7.2f}{p99:7.2f}"
+                      for name, p50, p95, p99 in self.profiler.summary()]
+            line_h = self.overlay_font.get_linesize() + 2
+            width = max(self.overlay_font.size(line)[0] for line in lines)
+            self.overlay = pygame.Surface((width + 8, line_h * len(lines) + 8))
+            self.overlay.fill((0, 0, 0))
+            for i, line in enumerate(lines):
+                self.overlay.blit(self.overlay_font.render(line, False, Conf.text_color), (4, 4 + i * line_h))
+        rect = self.display.frame.blit(self.overlay, (4, 4))
+        pygame.display.update(rect)
+
     def run(self):
+        try:
+            self._run()
+        finally:
+            if self.capture is not None:
+                self.stop_capture()
+            if self.profiler:
+                self.profiler.export_chrome_trace(Conf.profile_trace_filepath)
+
+    def stop_capture(self):
+        stats = self.capture.close()
+        print(f"Captured {stats['written']} frames to {self.capture.path}, {stats['dropped']} dropped")
+        if self.capture.error is not None:
+            print(f"  capture stopped: {self.capture.error}")
+
+    def _run(self):
+        """
+        logic runs in fixed Conf.tick_rate steps paid for out of an accumulator
+        of real time, so the game plays at the same speed on any machine, and
+        frames are drawn as often as Conf.max_fps allows.  each tick is told
+        the time it ends at, so key presses land on the tick they happened in
+        rather than whichever one next reads the keyboard.  when a frame falls
+        more than Conf.max_catchup_ticks behind, the rest of the backlog is
+        dropped rather than letting the catch-up spiral
+        :return:
+        """
+        accumulator = 0.0
+        previous = self.frame_ticked = time.perf_counter()
         while self.running:
+            frame_start_ns = time.perf_counter_ns()
+            self.loop.event_loop()
+            now = time.perf_counter()
+            now_ms = pygame.time.get_ticks()
+            accumulator += now - previous
+            previous = now
 
             if self.loop.paused:
-                self.loop.event_loop()
-                self.loop.key_check()
-                font = pygame.font.Font(None, 74)
-                text = font.render('PAUSED', True, (255, 255, 255))
-                self.display.frame.blit(text, (400 - text.get_width() // 2, 300 - text.get_height() // 2))
-                pygame.display.flip()
-            else:
-                content = self.loop.iteration()
-                self.display.render_frame(content,
-                                          self.game.next_piece,
-                                          self.game.pieces)
-            self.loop.clock.tick(60)
+                self.render_paused()
+                accumulator = 0.0
+                self.loop.clock.tick(Conf.max_fps or Conf.tick_rate)
+                previous = self.frame_ticked = time.perf_counter()
+                continue
+
+            steps = 0
+            while accumulator >= self.tick_seconds and steps < Conf.max_catchup_ticks:
+                accumulator -= self.tick_seconds
+                self.loop.update(now_ms - int(accumulator * 1000))
+                steps += 1
+            if accumulator >= self.tick_seconds:
+                dropped = int(accumulator // self.tick_seconds)
+                self.dropped_ticks += dropped
+                accumulator -= dropped * self.tick_seconds
+            self.ticks += steps
+
+            content = self.loop.render(accumulator / self.tick_seconds)
+            self.display.render_frame(content,
+                                      self.game.next_piece,
+                                      self.game.pieces)
+            self.frames += 1
+            if self.capture is not None:
+                self.capture.capture(self.display.frame)
+            if self.loop.applied_inputs:
+                self.report_input_latency()
+            if self.frames == 1:
+                self.startup.append(('first frame', frame_start_ns, time.perf_counter_ns()))
+                if self.profiler:
+                    self.report_startup()
+            if self.profiler:
+                self.profiler.record('frame', frame_start_ns, time.perf_counter_ns())
+                self.render_overlay()
+            self.wait_for_frame()
@@ -1,151 +1,219 @@
+import os
 import sys
 import time
 import pygame
-from random import choice
-from geometric_rain.classes.pieces import I, J, L, O, S, T, Z
+from geometric_rain.core.game import (GameCore, LEFT, RIGHT, UP, DOWN, LEFT_REPEATS, RIGHT_REPEATS,
+                                      REPEAT_MASK, shift_inputs)
+from geometric_rain.core.search import Autoplayer
+from geometric_rain.core.lookahead import LookaheadPlayer
+from geometric_rain.core.replay import ReplayRecorder
+from geometric_rain.classes.textures import atlas
 from geometric_rain.classes.input import Inputs
 from geometric_rain.config import Conf
 
 
 class Game(Inputs):
+    """
+    pygame front end for GameCore; turns key presses into per-tick input
+    bits, plays sounds for the events each tick reports, and draws the board
+    """
 
     def __init__(self, display, sound, scorekeeper):
         super().__init__()
         self.display = display
         self.sound = sound
         self.scorekeeper = scorekeeper
-        self.settled_pieces = pygame.sprite.Group()
-        self.pieces = [T, J, Z, O, S, L, I]
+        self.core = GameCore(scorekeeper)
+        self.board = self.core.board
+        self.pieces = self.core.pieces
         self.clock = pygame.time.Clock()
-        self.ticks_since_last_fall = 0
-        self.next_piece = choice(self.pieces)
-        self.piece = self.next_piece(self.settled_pieces, self.display)
-        self.update_stats()
-
-        self.slow_tick_interval = Conf.fall_frames_interval
-        self.fast_tick_interval = Conf.fast_fall_frames_interval
-
-    def update_stats(self):
-        self.scorekeeper.stats[self.piece.name] += 1
+        self.inputs = 0
+        self.previous_piece = (None, 0, 0)
+        self.recorder = ReplayRecorder(self.core) if Conf.record_replays else None
+        self.observation = None
+        self.observed_pixels = None
+        self.autoplayer = None
+        if Conf.autoplay:
+            self.autoplayer = LookaheadPlayer() if Conf.autoplay_beam_width else Autoplayer()
+
+        # settled blocks are drawn once into a persistent layer as they land,
+        # so a frame is one layer blit plus the active piece
+        self.game_area = self.display.game_panel.generate_content()
+        self.settled_layer = self.display.game_panel.generate_content()
+        self.rebuild_settled_layer()
+
+    @property
+    def piece(self):
+        return self.core.piece
+
+    @property
+    def next_piece(self):
+        return self.core.next_piece
 
     def down_arrow(self):
-        if self.ticks_since_last_fall >= self.fast_tick_interval:
-            self.maybe_fall()
+        self.inputs |= DOWN
 
-    def left_arrow(self):
-        self.piece.move(-1, 0)
-        self.left_pressed = False
+    def left_arrow(self, count: int = 1):
+        self.inputs |= shift_inputs(left=count)
 
-    def right_arrow(self):
-        self.piece.move(1, 0)
-        self.right_pressed = False
+    def right_arrow(self, count: int = 1):
+        self.inputs |= shift_inputs(right=count)
 
     def up_arrow(self):
-        rotated = self.piece.rotate()
-        if rotated:
-            self.sound.rotate.play()
+        self.inputs |= UP
+
+    def key_check(self, until_ms: int = None):
+        self.inputs = 0
+        if self.autoplayer is not None:
+            self.autoplay()
+        else:
+            super().key_check(until_ms)
+
+    def autoplay(self):
+        """
+        press the keys the autoplayer asks for, through the same hooks the
+        keyboard uses
+        :return:
+        """
+        inputs = self.autoplayer(self.core)
+        if inputs & DOWN:
+            self.down_arrow()
+        if inputs & UP:
+            self.up_arrow()
+        if inputs & LEFT:
+            self.left_arrow(1 + (inputs >> LEFT_REPEATS & REPEAT_MASK))
+        if inputs & RIGHT:
+            self.right_arrow(1 + (inputs >> RIGHT_REPEATS & REPEAT_MASK))
+
+    def observe(self, pixels: bool = False) -> dict:
+        """
+        the game as numpy views for an agent, see core.observe.Observation.
+        with pixels, 'pixels' is also a (rows, columns, 3) view of the board
+        as last rendered, sampled every Conf.observation_pixel_step pixels.
+        the sample is copied out of the surface into a buffer of its own,
+        refilled in place like the rest, so the surface isn't left locked
+        :return:
+        """
+        if self.observation is None:
+            from geometric_rain.core.observe import Observation
+            self.observation = Observation(self.core)
+        views = self.observation.update()
+        if not pixels:
+            return views
+        from geometric_rain.core.observe import read_only
+        step = Conf.observation_pixel_step or self.display.block_size
+        offset = step // 2
+        # the pixels3d view holds a lock on game_area for as long as it's
+        # alive, and blits onto a locked surface fail, so it goes here
+        surface = pygame.surfarray.pixels3d(self.game_area)
+        sample = surface[offset::step, offset::step].transpose(1, 0, 2)
+        if self.observed_pixels is None or self.observed_pixels.shape != sample.shape:
+            self.observed_pixels = sample.copy()
+        else:
+            self.observed_pixels[...] = sample
+        del sample, surface
+        return dict(views, pixels=read_only(self.observed_pixels))
+
+    def save_replay(self):
+        replay_path = os.path.join(self.scorekeeper.appdata_path, 'replays')
+        os.makedirs(replay_path, exist_ok=True)
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.core.seed}-{self.scorekeeper.current_score}.grr"
+        self.recorder.save(os.path.join(replay_path, filename))
 
     def end_game(self):
-        self.scorekeeper.save_appdata()
+        self.scorekeeper.save_appdata(self.core.seed, self.core.ticks)
+        if self.recorder is not None:
+            self.save_replay()
+        if self.autoplayer is not None:
+            self.autoplayer.shutdown()
         self.running = False
         pygame.quit()
         sys.exit()
 
-    def render(self) -> pygame.surface.Surface:
-        game_area = self.display.game_panel.generate_content()
-        for block in self.piece:
-            game_area.blit(block.image, block.rect.topleft)
-        for block in self.settled_pieces:
-            game_area.blit(block.image, block.rect.topleft)
-        return game_area
-
-    def maybe_fall(self):
-        if self.fast_drop_locked:
-            self.fast_drop_lockout_ticks += 1
-            if self.fast_drop_lockout_ticks >= Conf.fast_fall_lockout_ticks:
-                self.fast_drop_locked = False
-                self.fast_drop_lockout_ticks = 0
-        if self.ticks_since_last_fall >= self.slow_tick_interval or self.fast_drop_active:
-            self.piece.move(0, 1)
-            if self.piece.settled:
-                self.settled_pieces.add(self.piece)
-                self.piece = self.next_piece(self.settled_pieces, self.display)
-                self.next_piece = choice(self.pieces)
-                self.update_stats()
-                self.sound.piece_settled.play()
-                self.fast_drop_active = False
-                self.fast_drop_locked = True
-                self.fast_drop_lockout_ticks = 0
-                if self.piece.game_over:
-                    time.sleep(5)
-                    print('Game Over')
-                    self.end_game()
-            else:
-                self.scorekeeper.current_score += 2 if self.fast_drop_active else 1
-            self.ticks_since_last_fall = 0
-
-    def shift_blocks_down(self, floor_gy):
-        min_gy = min(block.gy for block in self.settled_pieces) if self.settled_pieces else 0
-        current_gy = floor_gy
-        while current_gy >= min_gy:
-            for block in self.settled_pieces:
-                if block.gy == current_gy:
-                    block.gy += 1
-                    block.rect.y += self.display.block_size
-            current_gy -= 1
-
-    def find_completed_rows(self):
-        rows = {}
-        for block in self.settled_pieces:
-            if block.gy not in rows:
-                rows[block.gy] = 1
+    def rebuild_settled_layer(self):
+        block_size = self.display.block_size
+        self.settled_layer.fill(self.display.game_panel.background_color)
+        for gx, gy, color in self.board.occupied():
+            self.settled_layer.blit(atlas.block(color, block_size), (gx * block_size, gy * block_size))
+
+    def draw_placed(self, cells, color):
+        block_size = self.display.block_size
+        image = atlas.block(color, block_size)
+        for gx, gy in cells:
+            self.settled_layer.blit(image, (gx * block_size, gy * block_size))
+
+    def scroll_cleared_rows(self, rows: list):
+        """
+        drop everything above each run of cleared rows with one scroll, top
+        run first so the rows below keep their positions
+        :return:
+        """
+        block_size = self.display.block_size
+        layer = self.settled_layer
+        background = self.display.game_panel.background_color
+        runs = []
+        for row in sorted(rows):
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
             else:
-                rows[block.gy] += 1
-        completed_rows = []
-        for row_y, count in rows.items():
-            if count == Conf.grid_width:
-                completed_rows.append(row_y)
-        completed_rows.sort()
-        return completed_rows
-
-    def process_completed_rows(self):
-        completed_rows = self.find_completed_rows()
-        if completed_rows:
-            self.scorekeeper.rows_cleared += len(completed_rows)
-            self.scorekeeper.total_rows_cleared += len(completed_rows)
-            self.scorekeeper.current_score += self.scorekeeper.rewards[len(completed_rows) - 1] * (self.scorekeeper.current_level + 1)
-
-            for row_y in completed_rows:
-                for block in self.settled_pieces:
-                    if block.gy == row_y:
-                        block.kill()
-                self.shift_blocks_down(row_y)
-            self.render()
-            if self.scorekeeper.rows_cleared < 10:
-                self.sound.row_completed.play()
-
-    def check_level(self):
-        if self.scorekeeper.rows_cleared >= 10:
-            self.scorekeeper.current_level += 1
-            self.scorekeeper.rows_cleared = 0
-            self.slow_tick_interval = max(1, self.slow_tick_interval - 2)
+                runs.append([row, row])
+        for first, last in runs:
+            count = last - first + 1
+            layer.set_clip(pygame.Rect(0, 0, layer.get_width(), (last + 1) * block_size))
+            layer.scroll(0, count * block_size)
+            layer.set_clip(None)
+            layer.fill(background, pygame.Rect(0, 0, layer.get_width(), count * block_size))
+
+    def render(self, alpha: float = 1.0) -> pygame.surface.Surface:
+        """
+        alpha is how far the clock is between the last tick and the next one;
+        a piece that fell on the last tick is drawn that far along its fall
+        :return:
+        """
+        block_size = self.display.block_size
+        self.game_area.blit(self.settled_layer, (0, 0))
+        piece_image = atlas.block(self.piece.color, block_size)
+        py_offset = 0
+        previous_piece, previous_gx, previous_gy = self.previous_piece
+        if (Conf.interpolate and previous_piece is self.piece
+                and previous_gx == self.piece.gx and previous_gy < self.piece.gy):
+            py_offset = int((previous_gy - self.piece.gy) * (1.0 - alpha) * block_size)
+        for gx, gy in self.piece.cells():
+            self.game_area.blit(piece_image, (gx * block_size, gy * block_size + py_offset))
+        return self.game_area
+
+    def handle_events(self, events: list):
+        if self.core.cleared_rows:
+            self.scroll_cleared_rows(self.core.cleared_rows)
+        for cells, color in self.core.placed:
+            self.draw_placed(cells, color)
+        if 'rotate' in events:
+            self.sound.play('rotate')
+        if 'piece_settled' in events:
+            self.sound.play('piece_settled')
+        if 'row_completed' in events and 'levelup' not in events:
+            self.sound.play('row_completed')
+        if 'levelup' in events:
             print(f"Level {self.scorekeeper.current_level}")
-            if self.scorekeeper.current_level <= 8:
-                self.slow_tick_interval -= 5
-            elif 8 < self.scorekeeper.current_level <= 12:
-                self.slow_tick_interval -= 2
-            elif 12 < self.scorekeeper.current_level <= 15:
-                self.slow_tick_interval -= 1
-            self.sound.levelup.play()
+            self.sound.play('levelup')
+        if 'game_over' in events:
+            time.sleep(5)
+            print('Game Over')
+            self.end_game()
+
+    def update(self, until_ms: int = None):
+        """
+        one fixed-length logic tick, taking the input that arrived before
+        until_ms, the time the tick ends at
+        :return:
+        """
+        self.previous_piece = (self.piece, self.piece.gx, self.piece.gy)
+        self.key_check(until_ms)
+        if self.recorder is not None:
+            self.recorder.record(self.inputs)
+        self.handle_events(self.core.step(self.inputs))
 
     def iteration(self):
-
-        self.process_completed_rows()
-        self.check_level()
-
         self.event_loop()
-        self.key_check()
-        self.maybe_fall()
-        self.ticks_since_last_fall += 1
-
+        self.update()
         return self.render()
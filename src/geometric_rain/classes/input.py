@@ -1,43 +1,118 @@
 import pygame
+from collections import deque
+from geometric_rain.config import Conf
 
 
+# keys whose presses are queued with their timestamps and played out tick by
+# tick, rather than read once a frame
+TIMED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP)
+
+
+def event_time(event, polled_ms: int) -> int:
+    """
+    when the event happened in sdl ticks (ms).  pygame builds that carry the
+    event's own timestamp use it.  others, pygame 2.6 among them, fall back
+    to polled_ms, when it was taken off sdl's queue, which is only as close
+    as the polls are frequent
+    :return:
+    """
+    timestamp = getattr(event, 'timestamp', None)
+    return polled_ms if timestamp is None else timestamp
+
 
 class Inputs:
 
     def __init__(self):
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
         self.running = True
         self.paused = False
         self.sound = None
-        self.fast_drop_active = False
-        self.fast_drop_locked = False
-        self.fast_drop_lockout_ticks = 0
-        self.last_music_state = 'on'
-
-    def key_check(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_DOWN]:
-            if not self.fast_drop_locked:
-                self.down_arrow()
-                self.fast_drop_active = True
-        else:
-            self.fast_drop_locked = False
-            self.fast_drop_active = False
-
-        if self.up_pressed:
-            self.up_pressed = False
+        self.show_overlay = False
+
+        # (time ms, key, pressed) for left, right and up, oldest first
+        self.key_events = deque()
+        # horizontal keys held down, most recently pressed last.  that one
+        # auto-shifts: Conf.das_ms after it went down, then every Conf.arr_ms
+        self.held_keys: list = []
+        self.next_shift_ms: int = 0
+        # press times of the keys applied since the last frame was shown
+        self.applied_inputs: list = []
+        # (time ms, event) taken off sdl's queue by poll_events, not yet handled
+        self.polled_events = deque()
+        # whether events carry their own timestamps; None until one arrives
+        self.event_timestamps = None
+
+    def auto_shifts(self, until_ms: int) -> int:
+        """
+        how many auto-repeat shifts fall due by until_ms
+        :return:
+        """
+        if not self.held_keys or self.next_shift_ms > until_ms:
+            return 0
+        if Conf.arr_ms <= 0:
+            return Conf.grid_width
+        shifts = (until_ms - self.next_shift_ms) // Conf.arr_ms + 1
+        self.next_shift_ms += shifts * Conf.arr_ms
+        return shifts
+
+    def key_check(self, until_ms: int = None):
+        """
+        play out every queued press up to until_ms, the end of the tick being
+        run, along with any auto-repeats due by then.  a second rotate in one
+        tick waits for the next
+        :return:
+        """
+        until_ms = pygame.time.get_ticks() if until_ms is None else until_ms
+        # the fast drop lockout after a piece settles is GameCore's to keep
+        if pygame.key.get_pressed()[pygame.K_DOWN]:
+            self.down_arrow()
+
+        shifts = {pygame.K_LEFT: 0, pygame.K_RIGHT: 0}
+        rotated = False
+        while True:
+            horizon = until_ms
+            if self.key_events and self.key_events[0][0] < until_ms:
+                horizon = self.key_events[0][0]
+            if self.held_keys:
+                shifts[self.held_keys[-1]] += self.auto_shifts(horizon)
+            if not self.key_events or self.key_events[0][0] > until_ms:
+                break
+            time_ms, key, pressed = self.key_events[0]
+            if key == pygame.K_UP:
+                if pressed and rotated:
+                    break
+                if pressed:
+                    rotated = True
+                    self.applied_inputs.append(time_ms)
+            elif pressed:
+                if key in self.held_keys:
+                    self.held_keys.remove(key)
+                self.held_keys.append(key)
+                self.next_shift_ms = time_ms + Conf.das_ms
+                shifts[key] += 1
+                self.applied_inputs.append(time_ms)
+            elif key in self.held_keys:
+                if self.held_keys[-1] == key:
+                    self.next_shift_ms = time_ms + Conf.das_ms
+                self.held_keys.remove(key)
+            self.key_events.popleft()
+
+        if rotated:
             self.up_arrow()
-
-        if self.left_pressed:
-            self.left_pressed = False
-            self.left_arrow()
-
-        if self.right_pressed:
-            self.right_pressed = False
-            self.right_arrow()
+        if shifts[pygame.K_LEFT]:
+            self.left_arrow(shifts[pygame.K_LEFT])
+        if shifts[pygame.K_RIGHT]:
+            self.right_arrow(shifts[pygame.K_RIGHT])
+
+    def resume_keys(self):
+        """
+        drop presses queued while paused and recharge the auto-shift delay,
+        so keys held through a pause don't fire a burst of repeats
+        :return:
+        """
+        self.key_events.clear()
+        keys = pygame.key.get_pressed()
+        self.held_keys = [key for key in self.held_keys if keys[key]]
+        self.next_shift_ms = pygame.time.get_ticks() + Conf.das_ms
 
     def down_arrow(self):
         ...
@@ -45,10 +120,10 @@ class Inputs:
     def up_arrow(self):
         ...
 
-    def right_arrow(self):
+    def right_arrow(self, count: int = 1):
         ...
 
-    def left_arrow(self):
+    def left_arrow(self, count: int = 1):
         ...
 
     def escape(self):
@@ -57,36 +132,46 @@ class Inputs:
     def end_game(self):
         ...
 
-    def event_loop(self):
+    def poll_events(self):
+        """
+        take whatever sdl has queued and stamp it.  the engine calls this
+        while it waits out each frame as well as at the top of it, so presses
+        are timed to within Conf.input_poll_ms on builds whose events carry
+        no timestamp of their own
+        :return:
+        """
+        polled_ms = pygame.time.get_ticks()
         for event in pygame.event.get():
+            if self.event_timestamps is None and event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                self.event_timestamps = getattr(event, 'timestamp', None) is not None
+            self.polled_events.append((event_time(event, polled_ms), event))
+
+    def event_loop(self):
+        self.poll_events()
+        while self.polled_events:
+            time_ms, event = self.polled_events.popleft()
             if event.type == pygame.QUIT:
                 self.running = False
                 self.end_game()
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    self.left_pressed = True
-                if event.key == pygame.K_RIGHT:
-                    self.right_pressed = True
-                if event.key == pygame.K_UP:
-                    self.up_pressed = True
+                if event.key in TIMED_KEYS:
+                    self.key_events.append((time_ms, event.key, True))
                 if event.key == pygame.K_m:
                     self.sound.toggle_music()
+                if event.key == pygame.K_F3:
+                    self.show_overlay = not self.show_overlay
                 if event.key == pygame.K_ESCAPE:
                     if self.paused:
                         self.paused = False
-                        if self.sound.music_state == 'on':
-                            self.sound.toggle_music()
+                        self.resume_keys()
+                        self.sound.resume_music()
                     else:
                         self.paused = True
-                        if self.sound.music_state == 'on':
-                            self.sound.toggle_music(preserve_state=True)
+                        self.sound.pause_music()
 
                 if event.key == pygame.K_q:
                     self.end_game()
             elif event.type == pygame.KEYUP:
-                if event.key == pygame.K_LEFT:
-                    self.left_pressed = False
-                if event.key == pygame.K_RIGHT:
-                    self.right_pressed = False
-
+                if event.key in TIMED_KEYS:
+                    self.key_events.append((time_ms, event.key, False))
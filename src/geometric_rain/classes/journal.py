@@ -0,0 +1,190 @@
+import os
+import json
+import zlib
+import struct
+from contextlib import contextmanager
+from geometric_rain.config import Conf
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+# every journal record is its payload length and crc32, then the payload, a
+# compact json object.  a record cut short by a crash fails its length or
+# crc check and ends the scan
+RECORD_HEADER = struct.Struct('<II')
+
+
+@contextmanager
+def locked(f):
+    """
+    hold an exclusive lock on the open file f, blocking until it's free
+    :return:
+    """
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def encode_record(result: dict) -> bytes:
+    payload = json.dumps(result, separators=(',', ':')).encode()
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(f, offset: int) -> tuple:
+    """
+    every whole record from offset on
+    :return: (records, offset just past the last whole record)
+    """
+    f.seek(offset)
+    data = f.read()
+    records = []
+    position = 0
+    while position + RECORD_HEADER.size <= len(data):
+        length, crc = RECORD_HEADER.unpack_from(data, position)
+        payload = data[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        records.append(json.loads(payload))
+        position += RECORD_HEADER.size + length
+    return records, offset + position
+
+
+def fsync_directory(directory: str):
+    """
+    make a rename in directory durable.  windows can't open a directory, and
+    makes renames durable without it
+    :return:
+    """
+    if fcntl is None:
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def leaderboard_key(result: dict) -> tuple:
+    return result['score'], result.get('lines', 0)
+
+
+class ScoreJournal:
+    """
+    an append-only file of game results, shared safely by any number of
+    running games.  appends happen under a lock on the journal itself, so
+    concurrent games interleave whole records.  the leaderboard index caches
+    the top Conf.leaderboard_size results and the journal offset it has read
+    up to; loading reads the index plus the records appended since, and once
+    Conf.journal_compact_every of those build up they're folded into a new
+    index.  records are only ever appended, apart from trimming a partial
+    one a crash left at the end.  the journal is the source of truth: an
+    index that's missing, unreadable or ahead of the journal is rebuilt by
+    reading every record again
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.journal_filepath = os.path.join(directory, f"{name}.journal")
+        self.index_filepath = os.path.join(directory, f"{name}.leaderboard.json")
+        self.leaderboard: list = []
+        self.games: int = 0
+        self.offset: int = 0
+        self.pending: list = []
+        open(self.journal_filepath, 'ab').close()
+
+    def read_index(self, report: bool = True) -> dict | None:
+        """
+        the leaderboard index, an empty one if there's none yet, or None if
+        it can't be trusted
+        :return:
+        """
+        if not os.path.exists(self.index_filepath):
+            return {'leaderboard': [], 'games': 0, 'offset': 0}
+        try:
+            with open(self.index_filepath, 'r') as f:
+                index = json.load(f)
+            if not (isinstance(index['leaderboard'], list) and isinstance(index['games'], int)
+                    and 0 <= index['offset'] <= os.path.getsize(self.journal_filepath)):
+                raise ValueError('index is inconsistent with the journal')
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if report:
+                print(f"Rebuilding leaderboard index {self.index_filepath}: {e}")
+            return None
+        return index
+
+    def load(self):
+        index = self.read_index()
+        rebuild = index is None
+        index = index or {'leaderboard': [], 'games': 0, 'offset': 0}
+        self.leaderboard = index['leaderboard']
+        self.games = index['games']
+        self.offset = index['offset']
+        with open(self.journal_filepath, 'rb+') as f:
+            with locked(f):
+                self.pending, end = read_records(f, self.offset)
+                # a game that died mid-append leaves a partial record; drop it
+                # so later appends aren't stranded behind it
+                if end < os.fstat(f.fileno()).st_size:
+                    f.truncate(end)
+        if rebuild or len(self.pending) >= Conf.journal_compact_every:
+            self.compact()
+
+    def top(self, count: int = None) -> list:
+        results = sorted(self.leaderboard + self.pending, key=leaderboard_key, reverse=True)
+        return results[:count or Conf.leaderboard_size]
+
+    @property
+    def high_score(self) -> int:
+        best = max(self.leaderboard + self.pending, key=leaderboard_key, default=None)
+        return best['score'] if best else 0
+
+    def append(self, result: dict):
+        record = encode_record(result)
+        with open(self.journal_filepath, 'ab') as f:
+            with locked(f):
+                f.seek(0, os.SEEK_END)
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+        self.pending.append(result)
+        if len(self.pending) >= Conf.journal_compact_every:
+            self.compact()
+
+    def compact(self):
+        """
+        fold every record past the index's offset into a new index, written
+        to a temporary file, synced, and swapped in so neither a reader nor a
+        crash can leave half of one
+        :return:
+        """
+        with open(self.journal_filepath, 'rb+') as f:
+            with locked(f):
+                index = self.read_index(report=False) or {'leaderboard': [], 'games': 0, 'offset': 0}
+                records, offset = read_records(f, index['offset'])
+                self.leaderboard = sorted(index['leaderboard'] + records, key=leaderboard_key,
+                                          reverse=True)[:Conf.leaderboard_size]
+                self.games = index['games'] + len(records)
+                self.offset = offset
+                self.pending = []
+                temporary_filepath = f"{self.index_filepath}.tmp"
+                with open(temporary_filepath, 'w') as index_file:
+                    json.dump({'leaderboard': self.leaderboard, 'games': self.games, 'offset': self.offset},
+                              index_file)
+                    index_file.flush()
+                    os.fsync(index_file.fileno())
+                os.replace(temporary_filepath, self.index_filepath)
+                fsync_directory(os.path.dirname(self.index_filepath) or '.')
@@ -11,12 +11,15 @@ class Menu(Inputs):
         self.display = display
         self.clock = pygame.time.Clock()
 
+    def update(self, until_ms: int = None):
+        self.key_check(until_ms)
+
     def iteration(self):
         self.event_loop()
-        self.key_check()
+        self.update()
         return self.render()
 
-    def render(self):
+    def render(self, alpha: float = 1.0):
         return pygame.surface.Surface(self.display.content_size)
 
     def end_game(self):
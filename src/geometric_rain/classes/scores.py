@@ -1,51 +1,50 @@
 import os
 import json
 from appdirs import user_data_dir
+from geometric_rain.core.score import Score
+from geometric_rain.classes.journal import ScoreJournal
+from geometric_rain.config import Conf
 
 
 
-class Scorekeeper:
-    rewards = [40, 100, 300, 1200]
+class Scorekeeper(Score):
 
-    def __init__(self, game_name: str):
-        self.current_level: int = 0
-        self.current_score: int = 0
-        self.top_score: int = 0
-        self.rows_cleared: int = 0
-        self.total_rows_cleared: int = 0
+    def __init__(self, game_name: str, appdata_path: str = None):
+        super().__init__()
         self.game_name = game_name
-        self.stats = {
-            'I': 0,
-            'J': 0,
-            'L': 0,
-            'O': 0,
-            'S': 0,
-            'T': 0,
-            'Z': 0,
-        }
-        self.appdata = {}
+        self.appdata_path = appdata_path
         self.appdata_filepath = None
+        self.journal = None
         self._init_appdata()
         self.load_appdata()
-        self.top_score = self.appdata.get('high_score', 0)
+        self.top_score = self.journal.high_score
 
     def _init_appdata(self):
-        appdata_path = user_data_dir(self.game_name, "Nebko16")
-        os.makedirs(appdata_path, exist_ok=True)
-        self.appdata_filepath = os.path.join(appdata_path, f"{self.game_name.replace(' ', '')}.json")
+        self.appdata_path = self.appdata_path or user_data_dir(self.game_name, "Nebko16")
+        os.makedirs(self.appdata_path, exist_ok=True)
+        self.appdata_filepath = os.path.join(self.appdata_path, f"{self.game_name.replace(' ', '')}.json")
+        self.journal = ScoreJournal(self.appdata_path, self.game_name.replace(' ', ''))
 
     def load_appdata(self):
-        if not os.path.exists(self.appdata_filepath):
-            with open(self.appdata_filepath, 'w') as f:
-                json.dump({}, f)
-        with open(self.appdata_filepath, 'r') as f:
-            self.appdata = json.load(f)
-        if 'high_score' not in self.appdata:
-            self.appdata['high_score'] = 0
+        self.journal.load()
+        if not self.journal.games and not self.journal.pending and os.path.exists(self.appdata_filepath):
+            # carry the high score over from the json file older versions kept
+            with open(self.appdata_filepath, 'r') as f:
+                high_score = json.load(f).get('high_score', 0)
+            if high_score:
+                self.journal.append({'score': high_score})
 
-    def save_appdata(self):
-        current_high_score = self.appdata.get('high_score', 0)
-        if self.current_score > current_high_score:
-            self.appdata['high_score'] = self.current_score
-            with open(self.appdata_filepath, 'w') as f:
-                json.dump(self.appdata, f)
+    def save_appdata(self, seed: int = None, ticks: int = 0):
+        """
+        append the finished game to the journal
+        :return:
+        """
+        self.journal.append({
+            'score': self.current_score,
+            'lines': self.total_rows_cleared,
+            'level': self.current_level,
+            'stats': dict(self.stats),
+            'duration': round(ticks / Conf.tick_rate, 2),
+            'seed': seed,
+        })
+        self.top_score = max(self.top_score, self.current_score)
@@ -1,57 +1,120 @@
+import time
 import pygame
+from geometric_rain.classes.assets import assets
 from geometric_rain.config import Conf
 
 
 
-class Sound:
+class ChannelPool:
+    """
+    a fixed set of mixer channels, all reserved so pygame never hands them
+    out on its own.  an effect plays on an idle channel if there is one,
+    otherwise it steals the voice with the lowest priority (the oldest among
+    equals) as long as that isn't above its own, or is dropped.  an effect
+    played again within its min_interval is skipped, so a burst of the same
+    sound on one tick costs a single voice
+    """
 
-    def __init__(self):
-        pygame.mixer.init()
+    def __init__(self, count: int = None):
+        count = count or Conf.sound_channels
+        pygame.mixer.set_num_channels(count)
+        pygame.mixer.set_reserved(count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(count)]
+        # (priority, started) of what each channel was last given
+        self.voices: list = [(-1, 0.0)] * count
+        self.last_played: dict = {}
+        self.played: int = 0
+        self.stolen: int = 0
+        self.dropped: int = 0
+        self.limited: int = 0
+
+    def play(self, name: str, sound: pygame.mixer.Sound, priority: int = 0, min_interval: float = 0.0):
+        now = time.perf_counter()
+        last = self.last_played.get(name)
+        if last is not None and now - last < min_interval:
+            self.limited += 1
+            return None
+        index = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                index = i
+                break
+        if index is None:
+            index = min(range(len(self.voices)), key=self.voices.__getitem__)
+            if self.voices[index][0] > priority:
+                self.dropped += 1
+                return None
+            self.stolen += 1
+        channel = self.channels[index]
+        channel.play(sound)
+        self.voices[index] = (priority, now)
+        self.last_played[name] = now
+        self.played += 1
+        return channel
 
-        self.row_completed = self.load_sound('row_completed')
-        self.piece_settled = self.load_sound('piece_settled')
-        self.rotate = self.load_sound('rotate')
-        self.levelup = self.load_sound('levelup')
 
-        self.theme = self.load_sound('theme', music=True)
-        self.theme.play(-1)
+class Sound:
+    """
+    every effect is queued to decode in the background as soon as this is
+    made, and fetched the first time it's played, which only waits if it's
+    still decoding.  effects play through a ChannelPool, and the theme is
+    streamed from disk with pygame.mixer.music, starting once it's open.  an
+    asset that fails to load is reported once and stays silent, rather than
+    stopping the game the first time it's played
+    """
+
+    def __init__(self):
+        for asset_name in Conf.sounds:
+            assets.prefetch('sound', asset_name)
         self.music_state = 'on'
+        self.music_ready = False
+        self.pool = None
+        assets.prefetch('music', 'theme').add_done_callback(self._start_theme)
 
-    def toggle_music(self, preserve_state=False):
-        if self.theme.get_volume() > 0.0:
-            self.theme.set_volume(0.0)
-            if not preserve_state:
-                self.music_state = 'off'
-        else:
-            self.theme.set_volume(Conf.music.get('theme', {}).get('volume', 0.6))
-            if not preserve_state:
-                self.music_state = 'on'
-
-    @staticmethod
-    def load_sound(asset_name, music=False):
-        if music:
-            asset_conf = Conf.music.get(asset_name)
-            asset_path = Conf.music_assets
-            noun = 'music'
-        else:
-            asset_conf = Conf.sounds.get(asset_name)
-            asset_path = Conf.sound_assets
-            noun = 'sound'
-
-        if not asset_conf:
-            raise ValueError(f"{noun.title()} conf for asset '{asset_name}' not found in config.py")
-
-        filename = asset_conf.get('filename')
-        if not filename:
-            raise ValueError(f"{noun.title()} asset '{asset_name}' had no 'filename' attribute in config.py")
-
-        asset_filepath = f"{asset_path}/{filename}"
+    def __getattr__(self, asset_name):
+        if asset_name not in Conf.sounds:
+            raise AttributeError(asset_name)
         try:
-            asset = pygame.mixer.Sound(asset_filepath)
-        except pygame.error as e:
-            raise pygame.error(f"Error loading {noun} asset '{asset_name}' ({asset_filepath}): {e}")
-
-        volume = asset_conf.get('volume', 0.6)
-        asset.set_volume(volume)
+            asset = assets.sound(asset_name)
+        except (pygame.error, ValueError, OSError) as e:
+            print(f"Muting sound '{asset_name}': {e}")
+            asset = None
+        setattr(self, asset_name, asset)
         return asset
 
+    def play(self, asset_name: str):
+        asset = getattr(self, asset_name)
+        if asset is None:
+            return None
+        if self.pool is None:
+            assets.init_mixer().result()
+            self.pool = ChannelPool()
+        asset_conf = Conf.sounds[asset_name]
+        return self.pool.play(asset_name, asset,
+                              asset_conf.get('priority', 0), asset_conf.get('min_interval', 0.0))
+
+    def _start_theme(self, future):
+        error = future.exception()
+        if error is not None:
+            print(f"Playing without music: {error}")
+            return
+        self.music_ready = True
+        self._apply_music_volume()
+        pygame.mixer.music.play(-1)
+
+    def _apply_music_volume(self):
+        if self.music_ready:
+            volume = Conf.music.get('theme', {}).get('volume', 0.6)
+            pygame.mixer.music.set_volume(volume if self.music_state == 'on' else 0.0)
+
+    def toggle_music(self):
+        self.music_state = 'off' if self.music_state == 'on' else 'on'
+        self._apply_music_volume()
+
+    def pause_music(self):
+        if self.music_ready:
+            pygame.mixer.music.pause()
+
+    def resume_music(self):
+        if self.music_ready:
+            pygame.mixer.music.unpause()
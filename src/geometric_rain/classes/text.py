@@ -0,0 +1,69 @@
+from collections import OrderedDict
+import pygame
+from geometric_rain.config import Conf
+
+
+
+class TextCache:
+    """
+    bounded LRU of rendered text surfaces keyed by (font, text, color, antialias).
+    returned surfaces are shared, so callers must not draw on them
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries: int = max_entries or Conf.text_cache_size
+        self.surfaces = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def render(self, font: pygame.font.Font, text: str, antialias: bool, color: tuple) -> pygame.Surface:
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class GlyphStrip:
+    """
+    one font's digits rendered once, so counters are drawn by blitting cached
+    glyphs side by side instead of rasterizing the whole string.  only exact
+    for fixed-width fonts like the one the game ships with
+    """
+
+    def __init__(self, font: pygame.font.Font, color: tuple,
+                 antialias: bool = True, characters: str = '0123456789'):
+        self.glyphs = {character: font.render(character, antialias, color)
+                       for character in characters}
+        self.glyph_w = max(glyph.get_width() for glyph in self.glyphs.values())
+        self.glyph_h = max(glyph.get_height() for glyph in self.glyphs.values())
+
+    def size(self, text: str) -> tuple:
+        return len(text) * self.glyph_w, self.glyph_h
+
+    def render(self, surface: pygame.Surface, text: str, pos: tuple) -> pygame.Rect:
+        x, y = pos
+        glyphs = self.glyphs
+        for i, character in enumerate(text):
+            surface.blit(glyphs[character], (x + i * self.glyph_w, y))
+        return pygame.Rect(pos, self.size(text))
+
+
+text_cache = TextCache()
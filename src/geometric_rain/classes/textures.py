@@ -0,0 +1,70 @@
+import pygame
+from geometric_rain.config import Conf
+
+
+
+class TextureAtlas:
+    """
+    every block image the game draws, rendered once per (color, block_size,
+    border settings) and converted to the display's pixel format, plus a
+    pre-rendered thumbnail of each piece type for the sidebar panels.
+    callers share the returned surfaces, so they must not draw on them
+    """
+
+    def __init__(self):
+        self.blocks: dict = {}
+        self.thumbnails: dict = {}
+
+    @staticmethod
+    def border_settings() -> tuple:
+        return (Conf.block_border_color,
+                Conf.block_border_width,
+                Conf.block_border_radius)
+
+    @staticmethod
+    def _convert(surface: pygame.Surface, alpha: bool = False) -> pygame.Surface:
+        if pygame.display.get_surface() is None:
+            return surface
+        return surface.convert_alpha() if alpha else surface.convert()
+
+    def block(self, color: tuple, block_size: int) -> pygame.Surface:
+        key = (tuple(color), block_size, self.border_settings())
+        image = self.blocks.get(key)
+        if image is None:
+            image = pygame.Surface((block_size, block_size))
+            image.fill(Conf.block_border_color)
+            pygame.draw.rect(image,
+                             color,
+                             (Conf.block_border_width,
+                              Conf.block_border_width,
+                              block_size - Conf.block_border_width * 2,
+                              block_size - Conf.block_border_width * 2),
+                             border_radius=Conf.block_border_radius)
+            image = self._convert(image)
+            self.blocks[key] = image
+        return image
+
+    def thumbnail(self, piece_type, block_size: int, rotation: int = 0) -> pygame.Surface:
+        """
+        the piece drawn at its shape-matrix position on a transparent surface,
+        so it blits to the same spot its blocks would have
+        :return:
+        """
+        key = (piece_type.name, rotation, block_size, self.border_settings())
+        image = self.thumbnails.get(key)
+        if image is None:
+            size = len(piece_type.shape) * block_size
+            image = pygame.Surface((size, size), pygame.SRCALPHA)
+            block = self.block(piece_type.color, block_size)
+            for ox, oy in piece_type.rotations[rotation].offsets:
+                image.blit(block, (ox * block_size, oy * block_size))
+            image = self._convert(image, alpha=True)
+            self.thumbnails[key] = image
+        return image
+
+    def clear(self):
+        self.blocks.clear()
+        self.thumbnails.clear()
+
+
+atlas = TextureAtlas()
@@ -8,6 +8,9 @@ class Conf:
     grid_width: int = 10
     grid_height: int = 20
 
+    # 'bitboard' keeps each row as an integer mask, 'numpy' as a uint8 array
+    board_backend: str = 'bitboard'
+
     # percent of monitor's height, 0.45+
     # you'll need to adjust font-size if you scale it smaller than 0.45
     ui_scale: int = 0.5
@@ -20,6 +23,149 @@ class Conf:
     block_border_width: int = 2
     block_border_radius: int = 2
 
+    # built-in pieces in the order they're listed in the stats panel.  shapes
+    # are square matrices that rotate clockwise about their center, and
+    # spawn_x is the grid column the matrix's left edge spawns at.  more
+    # polyominoes can be added here or loaded from the json files listed in
+    # piece_files, which use the same layout
+    pieces = {
+        'T': {
+            'shape': [[0, 1, 0],
+                      [1, 1, 1],
+                      [0, 0, 0]],
+            'color': (146, 28, 231),
+            'spawn_x': 3
+        },
+        'J': {
+            'shape': [[1, 0, 0],
+                      [1, 1, 1],
+                      [0, 0, 0]],
+            'color': (0, 0, 230),
+            'spawn_x': 3
+        },
+        'Z': {
+            'shape': [[1, 1, 0],
+                      [0, 1, 1],
+                      [0, 0, 0]],
+            'color': (220, 47, 33),
+            'spawn_x': 3
+        },
+        'O': {
+            'shape': [[1, 1],
+                      [1, 1]],
+            'color': (240, 240, 79),
+            'spawn_x': 3
+        },
+        'S': {
+            'shape': [[0, 1, 1],
+                      [1, 1, 0],
+                      [0, 0, 0]],
+            'color': (110, 236, 71),
+            'spawn_x': 3
+        },
+        'L': {
+            'shape': [[0, 0, 1],
+                      [1, 1, 1],
+                      [0, 0, 0]],
+            'color': (228, 163, 57),
+            'spawn_x': 3
+        },
+        'I': {
+            'shape': [[0, 0, 0, 0],
+                      [1, 1, 1, 1],
+                      [0, 0, 0, 0],
+                      [0, 0, 0, 0]],
+            'color': (110, 236, 238),
+            'spawn_x': 2
+        }
+    }
+    piece_files: list = []
+
+    # the fall intervals below count logic ticks, which run at tick_rate per
+    # second no matter how fast frames are drawn.  max_fps caps the render
+    # rate (0 for uncapped), and a frame runs at most max_catchup_ticks
+    # ticks before the rest of the backlog is dropped
+    tick_rate: int = 60
+    max_fps: int = 60
+    max_catchup_ticks: int = 5
+    interpolate: bool = True
+
+    # per-phase frame timing, also switched on by play.py --profile.  F3
+    # toggles the overlay, and the trace is written to profile_trace_filepath
+    # on exit in chrome's trace-event format
+    profiling: bool = False
+    profile_window: int = 600
+    profile_trace_events: int = 200_000
+    profile_overlay_refresh: float = 0.5
+    profile_trace_filepath: str = 'geometric_rain_trace.json'
+
+    # every game's seed and per-tick inputs are saved to the appdata replays
+    # folder when it ends; python -m geometric_rain.bench replay checks them.
+    # a snapshot of the game is kept every replay_keyframe_interval ticks so
+    # a replay can be seeked without simulating from the start
+    record_replays: bool = True
+    replay_keyframe_interval: int = 600
+
+    # play.py --record captures every frame shown into a ring of
+    # capture_buffer_frames, written out on a background thread to
+    # capture_path: 'raw' rgb24 frames in one file, a 'png' sequence, or
+    # 'pipe' into capture_command, an encoder reading rgb24 on stdin.  when
+    # the writer falls behind, capture_drop 'newest' skips frames there's no
+    # room for and 'oldest' overwrites the longest-waiting one
+    capture: bool = False
+    capture_mode: str = 'png'
+    capture_path: str = 'geometric_rain_capture'
+    capture_buffer_frames: int = 32
+    capture_drop: str = 'newest'
+    capture_png_level: int = 1
+    capture_command: str = ('ffmpeg -y -loglevel error -f rawvideo -pix_fmt rgb24 -s {width}x{height} '
+                            '-r {fps} -i - {path}/capture.mp4')
+
+    # Game.observe(pixels=True) samples the drawn board every
+    # observation_pixel_step pixels, 0 for once per block at its centre
+    observation_pixel_step: int = 0
+
+    # finished games are appended to a journal in the appdata folder.  the
+    # top leaderboard_size are kept in an index that's rebuilt once
+    # journal_compact_every games have been added since it was last built
+    leaderboard_size: int = 100
+    journal_compact_every: int = 32
+
+    # holding left or right shifts once, then again after das_ms and every
+    # arr_ms from then on (0 slides straight to the wall), timed from the
+    # key events themselves rather than the frame they're read in
+    das_ms: int = 167
+    arr_ms: int = 33
+
+    # pygame builds whose key events carry no timestamp are stamped when
+    # they're polled, so the engine polls every input_poll_ms while it waits
+    # out a frame rather than only once per frame (0 polls once per frame)
+    input_poll_ms: int = 2
+
+    # play.py --autoplay hands the keys to a bot that searches every
+    # placement of each piece and scores the board each leaves with these
+    autoplay: bool = False
+    autoplay_weights = {
+        'lines': 0.76,
+        'aggregate_height': -0.51,
+        'holes': -0.36,
+        'bumpiness': -0.18,
+    }
+    # the best autoplay_beam_width placements of each piece are also scored
+    # by the best the next piece can do after them (0 plays greedily).  that
+    # runs on autoplay_workers processes (0 runs it in-process), by default
+    # one per spare core up to four, and any not back after
+    # autoplay_time_budget seconds are judged on their own
+    autoplay_beam_width: int = 8
+    autoplay_workers: int = max(0, min(4, (os.cpu_count() or 1) - 1))
+    autoplay_time_budget: float = 0.010
+    # boards the search has scored, keyed by zobrist hash, and the
+    # placements it found for each (board, piece, start), least recently
+    # used dropped first.  placement lists are only ever found again from
+    # the last beam's expansions, so a table a few beams deep loses nothing
+    transposition_table_size: int = 65536
+    placement_table_size: int = 64
+
     fall_frames_interval: int = 48
     fast_fall_frames_interval: int = 2
     fast_fall_lockout_ticks: int = 15
@@ -30,25 +176,43 @@ class Conf:
     music_assets = os.path.join(static_assets, 'music')
     font_assets = os.path.join(static_assets, 'fonts')
 
+    # sounds and music decode on this many background threads while the
+    # first frames draw
+    asset_workers: int = 4
+
     font_file: str = 'PressStart2P-Regular.ttf'
+    text_cache_size: int = 256
     font_filepath: str = f"{font_assets}/{font_file}"
 
+    # effects play on sound_channels reserved mixer channels.  when they're
+    # all busy a new effect takes over the lowest-priority one, if that's no
+    # higher than its own, and an effect repeated within min_interval seconds
+    # is skipped
+    sound_channels: int = 8
     sounds = {
         'row_completed': {
             'filename': 'sfx_sound_neutral7.wav',
-            'volume': 0.4
+            'volume': 0.4,
+            'priority': 2,
+            'min_interval': 0.05
         },
         'piece_settled': {
             'filename': 'sfx_movement_footsteps1a.wav',
-            'volume': 0.3
+            'volume': 0.3,
+            'priority': 1,
+            'min_interval': 0.05
         },
         'rotate': {
             'filename': 'sfx_sounds_interaction18.wav',
-            'volume': 0.2
+            'volume': 0.2,
+            'priority': 0,
+            'min_interval': 0.03
         },
         'levelup': {
             'filename': 'sfx_sounds_powerup16.wav',
-            'volume': 0.3
+            'volume': 0.3,
+            'priority': 3,
+            'min_interval': 0.05
         }
     }
     music = {
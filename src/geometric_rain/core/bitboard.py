@@ -0,0 +1,95 @@
+from geometric_rain.core.boardbase import BoardBase
+from geometric_rain.core.zobrist import zobrist_for
+
+
+
+class BitBoard(BoardBase):
+    """
+    the settled blocks as one integer bitmask per row, bit x set when column
+    x is occupied.  a piece collides when any of its precomputed row masks
+    ANDs with the board, and clearing rows is a list splice.  palette ids
+    are kept per row alongside the masks so the board can still be drawn.
+    self.hash is the zobrist hash of the occupied cells, kept up to date as
+    blocks are placed and rows cleared
+    """
+
+    def __init__(self, width: int = None, height: int = None):
+        super().__init__(width, height)
+        self.rows: list = [0] * self.height
+        self.colors: list = [[0] * self.width for _ in range(self.height)]
+        self.zobrist = zobrist_for(self.width, self.height)
+        self.hash: int = 0
+
+    def collides_piece(self, rotation, gx: int, gy: int) -> bool:
+        left, top, right, bottom = rotation.bbox
+        if gx + left < 0 or gx + right >= self.width or gy + top < 0 or gy + bottom >= self.height:
+            return True
+        shift = gx + left
+        rows = self.rows
+        for oy, bits in rotation.row_masks:
+            if rows[gy + oy] & (bits << shift):
+                return True
+        return False
+
+    def collides(self, offsets, gx: int = 0, gy: int = 0) -> bool:
+        width, height, rows = self.width, self.height, self.rows
+        for ox, oy in offsets:
+            x = gx + ox
+            y = gy + oy
+            if x < 0 or x >= width or y < 0 or y >= height or rows[y] >> x & 1:
+                return True
+        return False
+
+    def place(self, cells, color: tuple):
+        cid = self.color_id(color)
+        rows = self.rows
+        before = {}
+        for gx, gy in cells:
+            if gy not in before:
+                before[gy] = rows[gy]
+            rows[gy] |= 1 << gx
+            self.colors[gy][gx] = cid
+        row_key = self.zobrist.row_key
+        for gy, mask in before.items():
+            self.hash ^= row_key(gy, mask) ^ row_key(gy, rows[gy])
+        self.features.place(cells)
+
+    def clear_rows(self, rows: list):
+        if not rows:
+            return
+        cleared = set(rows)
+        keep = [gy for gy in range(self.height) if gy not in cleared]
+        before = self.rows
+        self.rows = [0] * len(rows) + [self.rows[gy] for gy in keep]
+        # only the rows down to the lowest cleared one moved
+        self.hash = self.zobrist.update(self.hash, before, self.rows, range(max(rows) + 1))
+        self.colors = [[0] * self.width for _ in rows] + [self.colors[gy] for gy in keep]
+        self.features.clear(rows)
+
+    def occupied(self):
+        """
+        yields (gx, gy, color) for every settled block
+        :return:
+        """
+        palette = self.palette
+        for gy, row in enumerate(self.rows):
+            if not row:
+                continue
+            colors = self.colors[gy]
+            while row:
+                low = row & -row
+                gx = low.bit_length() - 1
+                yield gx, gy, palette[colors[gx]]
+                row ^= low
+
+    def occupancy(self) -> list:
+        return list(self.rows)
+
+    def color_ids(self) -> list:
+        return self.colors
+
+    def reset(self):
+        self.rows = [0] * self.height
+        self.hash = 0
+        self.colors = [[0] * self.width for _ in range(self.height)]
+        self.features.reset()
@@ -0,0 +1,100 @@
+import numpy as np
+from geometric_rain.core.boardbase import BoardBase
+from geometric_rain.core.zobrist import zobrist_for
+
+
+
+class Board(BoardBase):
+    """
+    authoritative model of the settled blocks.  each cell holds 0 when empty,
+    otherwise an index into self.palette, so sprites and surfaces are derived
+    from the board for rendering rather than the other way around.  self.hash
+    is the zobrist hash of the occupied cells, the same as BitBoard's
+    """
+
+    def __init__(self, width: int = None, height: int = None):
+        super().__init__(width, height)
+        self.cells = np.zeros((self.height, self.width), dtype=np.uint8)
+        # each column's bit, for turning rows into BitBoard's masks with one
+        # matmul.  uint64 holds a row up to 64 columns wide; past that the
+        # bits are python ints, slower but never wrapping
+        self.columns = np.array([1 << gx for gx in range(self.width)],
+                                dtype=np.uint64 if self.width <= 64 else object)
+        self.zobrist = zobrist_for(self.width, self.height)
+        self.hash: int = 0
+
+    def collides(self, offsets, gx: int = 0, gy: int = 0) -> bool:
+        """
+        check if any of the (ox, oy) offsets placed at (gx, gy) fall outside
+        the grid or overlap a settled block
+        :return:
+        """
+        width, height, cells = self.width, self.height, self.cells
+        for ox, oy in offsets:
+            x = gx + ox
+            y = gy + oy
+            if x < 0 or x >= width or y < 0 or y >= height or cells[y, x]:
+                return True
+        return False
+
+    def row_mask(self, gy: int) -> int:
+        return int((self.cells[gy] != 0) @ self.columns)
+
+    def place(self, cells, color: tuple):
+        cid = self.color_id(color)
+        before = {}
+        for gx, gy in cells:
+            if gy not in before:
+                before[gy] = self.row_mask(gy)
+            self.cells[gy, gx] = cid
+        row_key = self.zobrist.row_key
+        for gy, mask in before.items():
+            self.hash ^= row_key(gy, mask) ^ row_key(gy, self.row_mask(gy))
+        self.features.place(cells)
+
+    def clear_rows(self, rows: list):
+        """
+        remove the given rows in one pass; everything above drops down by the
+        number of cleared rows beneath it, and empty rows fill in at the top
+        :return:
+        """
+        if not rows:
+            return
+        before = self.occupancy()
+        keep = np.ones(self.height, dtype=bool)
+        keep[rows] = False
+        remaining = self.cells[keep]
+        self.cells[:len(rows)] = 0
+        self.cells[len(rows):] = remaining
+        self.hash = self.zobrist.update(self.hash, before, self.occupancy(), range(max(rows) + 1))
+        self.features.clear(rows)
+
+    def occupied(self):
+        """
+        yields (gx, gy, color) for every settled block
+        :return:
+        """
+        gys, gxs = np.nonzero(self.cells)
+        for gx, gy in zip(gxs.tolist(), gys.tolist()):
+            yield gx, gy, self.palette[self.cells[gy, gx]]
+
+    def occupancy(self) -> list:
+        """
+        one integer per row with bit x set when column x is occupied, the
+        layout BitBoard keeps
+        :return:
+        """
+        return ((self.cells != 0) @ self.columns).tolist()
+
+    def color_ids(self) -> np.ndarray:
+        """
+        the palette id of every cell, row by row.  this is the board itself,
+        not a copy
+        :return:
+        """
+        return self.cells
+
+    def reset(self):
+        self.cells.fill(0)
+        self.hash = 0
+        self.features.reset()
@@ -0,0 +1,34 @@
+from geometric_rain.config import Conf
+from geometric_rain.core.features import BoardFeatures
+
+
+
+class BoardBase:
+    """
+    what every board backend shares: its size, the palette of block colors
+    that settled cells index into, and the BoardFeatures of its stack, which
+    backends update as they place blocks and clear rows
+    """
+
+    def __init__(self, width: int = None, height: int = None):
+        self.width: int = width or Conf.grid_width
+        self.height: int = height or Conf.grid_height
+        self.palette: list = [None]
+        self.features = BoardFeatures(self.width, self.height)
+
+    def color_id(self, color: tuple) -> int:
+        color = tuple(color)
+        if color not in self.palette:
+            if len(self.palette) > 255:
+                raise ValueError(f"Board palette is full, can't add color {color}")
+            self.palette.append(color)
+        return self.palette.index(color)
+
+    def find_completed_rows(self) -> list:
+        return self.features.full_rows()
+
+    def out_of_bounds(self, gx: int, gy: int) -> bool:
+        return gx < 0 or gx >= self.width or gy < 0 or gy >= self.height
+
+    def collides_piece(self, rotation, gx: int, gy: int) -> bool:
+        return self.collides(rotation.offsets, gx, gy)
@@ -0,0 +1,124 @@
+from array import array
+
+
+
+class BoardFeatures:
+    """
+    the shape of a board's stack, kept up to date as blocks land and rows
+    clear rather than worked out by scanning the grid.  heights, holes and
+    wells are per column, row_counts per row, all read-only views (wrap
+    them in np.asarray to get arrays without a copy); aggregate_height,
+    hole_count and bumpiness are their totals.  a hole is an empty cell
+    with a filled one somewhere above it, and a column's well depth is how
+    far it sits below the lower of its neighbours, the walls counting as
+    full height.
+
+    each column is also kept as a bitmask, bit gy set when that cell is
+    filled, so placing a piece costs its cells plus the span of columns it
+    covers and one either side, and a clear is a few shifts per column.
+    version goes up on every change, for anything caching the board
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width: int = width
+        self.height: int = height
+        self.columns: list = [0] * width
+        self._heights = array('i', [0] * width)
+        self._holes = array('i', [0] * width)
+        self._wells = array('i', [0] * width)
+        self._row_counts = array('i', [0] * height)
+        self.heights = memoryview(self._heights).toreadonly()
+        self.holes = memoryview(self._holes).toreadonly()
+        self.wells = memoryview(self._wells).toreadonly()
+        self.row_counts = memoryview(self._row_counts).toreadonly()
+        self.aggregate_height: int = 0
+        self.hole_count: int = 0
+        self.bumpiness: int = 0
+        self.full: set = set()
+        self.version: int = 0
+
+    def place(self, cells):
+        self.version += 1
+        columns = self.columns
+        row_counts = self._row_counts
+        width = self.width
+        lo = width
+        hi = -1
+        for gx, gy in cells:
+            columns[gx] |= 1 << gy
+            row_counts[gy] += 1
+            if row_counts[gy] == width:
+                self.full.add(gy)
+            if gx < lo:
+                lo = gx
+            if gx > hi:
+                hi = gx
+        if hi >= 0:
+            self._update(lo, hi)
+
+    def clear(self, rows: list):
+        """
+        drop the given rows out of every column, top one first, so rows
+        below a cleared one keep their index while the ones above move down
+        :return:
+        """
+        if not rows:
+            return
+        self.version += 1
+        columns = self.columns
+        for gy in sorted(rows):
+            below = -1 << (gy + 1)
+            above = (1 << gy) - 1
+            for gx, column in enumerate(columns):
+                columns[gx] = (column & below) | (column & above) << 1
+        cleared = set(rows)
+        kept = [count for gy, count in enumerate(self._row_counts) if gy not in cleared]
+        self._row_counts[:] = array('i', [0] * len(cleared) + kept)
+        self.full = {gy for gy, count in enumerate(self._row_counts) if count == self.width}
+        self._update(0, self.width - 1)
+
+    def full_rows(self) -> list:
+        return sorted(self.full)
+
+    def reset(self):
+        self.version += 1
+        self.columns = [0] * self.width
+        for values in (self._heights, self._holes, self._wells, self._row_counts):
+            values[:] = array('i', bytes(len(values) * values.itemsize))
+        self.aggregate_height = 0
+        self.hole_count = 0
+        self.bumpiness = 0
+        self.full = set()
+
+    def _update(self, lo: int, hi: int):
+        """
+        redo the heights and holes of columns lo to hi, and the bumpiness
+        and wells that depend on them
+        :return:
+        """
+        width = self.width
+        height = self.height
+        heights = self._heights
+        holes = self._holes
+        first = max(lo - 1, 0)
+        last = min(hi + 1, width - 1)
+        bumpiness = 0
+        for x in range(first, last):
+            bumpiness -= abs(heights[x] - heights[x + 1])
+        for gx in range(lo, hi + 1):
+            column = self.columns[gx]
+            column_height = height - ((column & -column).bit_length() - 1) if column else 0
+            column_holes = column_height - column.bit_count()
+            self.aggregate_height += column_height - heights[gx]
+            self.hole_count += column_holes - holes[gx]
+            heights[gx] = column_height
+            holes[gx] = column_holes
+        for x in range(first, last):
+            bumpiness += abs(heights[x] - heights[x + 1])
+        self.bumpiness += bumpiness
+        wells = self._wells
+        for gx in range(first, last + 1):
+            left = heights[gx - 1] if gx else height
+            right = heights[gx + 1] if gx < width - 1 else height
+            well = min(left, right) - heights[gx]
+            wells[gx] = well if well > 0 else 0
@@ -0,0 +1,321 @@
+import random
+import importlib
+from geometric_rain.config import Conf
+from geometric_rain.core.boardbase import BoardBase
+from geometric_rain.core.score import Score
+from geometric_rain.core.pieces import registry, PieceType
+
+
+# per-tick input bits, the same four keys Inputs tracks
+LEFT = 1
+RIGHT = 2
+UP = 4
+DOWN = 8
+
+# a tick can shift the piece more than once.  the shifts beyond the first
+# are counted in four bits per direction above the keys, so inputs without
+# them, like older replays, still shift once
+LEFT_REPEATS = 4
+RIGHT_REPEATS = 8
+REPEAT_MASK = 0xF
+
+
+def shift_inputs(left: int = 0, right: int = 0) -> int:
+    """
+    the input bits for shifting left and right that many times this tick
+    :return:
+    """
+    inputs = 0
+    if left > 0:
+        inputs |= LEFT | min(left - 1, REPEAT_MASK) << LEFT_REPEATS
+    if right > 0:
+        inputs |= RIGHT | min(right - 1, REPEAT_MASK) << RIGHT_REPEATS
+    return inputs
+
+# backends are imported on first use, so numpy is only loaded by games
+# that ask for the numpy board
+BOARD_BACKENDS = {
+    'numpy': 'geometric_rain.core.board:Board',
+    'bitboard': 'geometric_rain.core.bitboard:BitBoard',
+}
+
+
+def make_board(backend: str = None, width: int = None, height: int = None) -> BoardBase:
+    backend = backend or Conf.board_backend
+    if backend not in BOARD_BACKENDS:
+        raise ValueError(f"Unknown board backend '{backend}', expected one of {sorted(BOARD_BACKENDS)}")
+    module_name, class_name = BOARD_BACKENDS[backend].split(':')
+    return getattr(importlib.import_module(module_name), class_name)(width, height)
+
+
+def backend_name(board: BoardBase) -> str | None:
+    path = f"{type(board).__module__}:{type(board).__name__}"
+    for name, backend_path in BOARD_BACKENDS.items():
+        if backend_path == path:
+            return name
+    return None
+
+
+# the Conf values GameCore reads while it plays, taken when it's made
+TIMING = ('fall_frames_interval', 'fast_fall_frames_interval', 'fast_fall_lockout_ticks')
+
+
+
+class GameCore:
+    """
+    the rules of the game in grid coordinates only, with no pygame anywhere.
+    step() runs one tick with the same ordering as the old Game.iteration:
+    clear rows, check level, apply inputs, then gravity.  anything worth
+    reacting to (sounds, prints, rendering) is reported through self.events,
+    with the cells placed and rows removed that tick in self.placed and
+    self.cleared_rows.  the TIMING values come from Conf unless timing gives
+    them, so a replay can play under the ones it was recorded with
+    """
+
+    def __init__(self, score: Score = None, board: BoardBase = None, pieces: list = None,
+                 seed: int = None, timing: dict = None):
+        self.score = score or Score()
+        self.board = board or make_board()
+        self.pieces = pieces or registry.pieces
+        timing = timing or {}
+        self.fall_frames_interval: int = timing.get('fall_frames_interval', Conf.fall_frames_interval)
+        self.fast_fall_frames_interval: int = timing.get('fast_fall_frames_interval', Conf.fast_fall_frames_interval)
+        self.fast_fall_lockout_ticks: int = timing.get('fast_fall_lockout_ticks', Conf.fast_fall_lockout_ticks)
+        self.rng = random.Random()
+        self.events: list = []
+        self.reset(seed)
+
+    def reset(self, seed: int = None):
+        """
+        start a new game.  without a seed one is drawn, so every game can be replayed
+        :return:
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.board.reset()
+        self.score.reset()
+        self.events = []
+        self.placed = []
+        self.cleared_rows = []
+        self.ticks = 0
+        self.ticks_since_last_fall = 0
+        self.slow_tick_interval = self.fall_frames_interval
+        self.fast_tick_interval = self.fast_fall_frames_interval
+        self.fast_drop_active = False
+        self.fast_drop_locked = False
+        self.fast_drop_lockout_ticks = 0
+        self.rows_dirty = False
+        self.game_over = False
+        self.next_piece = self.rng.choice(self.pieces)
+        self.piece = None
+        self.spawn()
+
+    def spawn(self):
+        self.piece = self.next_piece()
+        self.next_piece = self.rng.choice(self.pieces)
+        self.score.stats[self.piece.name] = self.score.stats.get(self.piece.name, 0) + 1
+        if self.board.collides_piece(self.piece.state, self.piece.gx, self.piece.gy):
+            self.game_over = True
+            self.events.append('game_over')
+
+    def shift(self, dgx: int) -> bool:
+        if self.board.collides_piece(self.piece.state, self.piece.gx + dgx, self.piece.gy):
+            return False
+        self.piece.gx += dgx
+        return True
+
+    def rotate(self, turns: int = 1) -> bool:
+        rotation = self.piece.rotated(turns)
+        if self.board.collides_piece(self.piece.type.rotations[rotation], self.piece.gx, self.piece.gy):
+            return False
+        self.piece.rotation = rotation
+        self.events.append('rotate')
+        return True
+
+    def soft_drop(self):
+        if self.ticks_since_last_fall >= self.fast_tick_interval:
+            self.maybe_fall()
+
+    def settle(self):
+        cells = self.piece.cells()
+        self.board.place(cells, self.piece.color)
+        self.placed.append((cells, self.piece.color))
+        self.rows_dirty = True
+        self.events.append('piece_settled')
+        self.fast_drop_active = False
+        self.fast_drop_locked = True
+        self.fast_drop_lockout_ticks = 0
+        self.spawn()
+
+    def maybe_fall(self):
+        if self.fast_drop_locked:
+            self.fast_drop_lockout_ticks += 1
+            if self.fast_drop_lockout_ticks >= self.fast_fall_lockout_ticks:
+                self.fast_drop_locked = False
+                self.fast_drop_lockout_ticks = 0
+        if self.ticks_since_last_fall >= self.slow_tick_interval or self.fast_drop_active:
+            if self.board.collides_piece(self.piece.state, self.piece.gx, self.piece.gy + 1):
+                self.settle()
+            else:
+                self.piece.gy += 1
+                self.score.current_score += 2 if self.fast_drop_active else 1
+            self.ticks_since_last_fall = 0
+
+    def process_completed_rows(self):
+        if not self.rows_dirty:
+            return
+        self.rows_dirty = False
+        completed_rows = self.board.find_completed_rows()
+        if completed_rows:
+            cleared = len(completed_rows)
+            self.score.rows_cleared += cleared
+            self.score.total_rows_cleared += cleared
+            self.score.current_score += self.score.rewards[min(cleared, len(self.score.rewards)) - 1] * (self.score.current_level + 1)
+            self.board.clear_rows(completed_rows)
+            self.cleared_rows = completed_rows
+            self.events.append('row_completed')
+
+    def check_level(self):
+        if self.score.rows_cleared >= 10:
+            self.score.current_level += 1
+            self.score.rows_cleared = 0
+            self.slow_tick_interval = max(1, self.slow_tick_interval - 2)
+            if self.score.current_level <= 8:
+                self.slow_tick_interval -= 5
+            elif 8 < self.score.current_level <= 12:
+                self.slow_tick_interval -= 2
+            elif 12 < self.score.current_level <= 15:
+                self.slow_tick_interval -= 1
+            self.events.append('levelup')
+
+    def rules(self) -> dict:
+        """
+        everything besides the seed and inputs that decides how a game plays
+        out, as plain json-safe values
+        :return:
+        """
+        return {
+            'grid': [self.board.width, self.board.height],
+            'board_backend': backend_name(self.board),
+            **{name: getattr(self, name) for name in TIMING},
+            'rewards': list(self.score.rewards),
+            'pieces': [[piece_type.name, [list(row) for row in piece_type.shape], list(piece_type.color),
+                        piece_type.spawn_x] for piece_type in self.pieces],
+        }
+
+    @classmethod
+    def from_rules(cls, rules: dict, seed: int = None) -> 'GameCore':
+        """
+        a core that plays by the given rules rather than the current Conf
+        :return:
+        """
+        width, height = rules['grid']
+        pieces = [PieceType(name, shape, color, spawn_x) for name, shape, color, spawn_x in rules['pieces']]
+        score = Score()
+        score.rewards = list(rules['rewards'])
+        return cls(score, make_board(rules['board_backend'], width, height), pieces, seed,
+                   {name: rules[name] for name in TIMING})
+
+    def check_rules(self, rules: dict):
+        """
+        refuse to carry on a game recorded under other rules than this core's
+        :return:
+        """
+        own = self.rules()
+        # every backend plays the same game, so a bitboard can carry on one
+        # recorded on the numpy board
+        differences = [name for name in sorted(set(own) | set(rules))
+                       if name != 'board_backend' and own.get(name) != rules.get(name)]
+        if differences:
+            raise ValueError(f"Game was recorded under different rules ({', '.join(differences)}); "
+                             f"replay it on GameCore.from_rules(...)")
+
+    def snapshot(self) -> dict:
+        """
+        everything needed to carry on from this tick, as plain json-safe values
+        :return:
+        """
+        score = self.score
+        return {
+            'rules': self.rules(),
+            'seed': self.seed,
+            'rng': self.rng.getstate(),
+            'board': [[gx, gy, list(color)] for gx, gy, color in self.board.occupied()],
+            'piece': [self.piece.name, self.piece.rotation, self.piece.gx, self.piece.gy],
+            'next_piece': self.next_piece.name,
+            'score': [score.current_level, score.current_score, score.rows_cleared,
+                      score.total_rows_cleared, dict(score.stats)],
+            'ticks': [self.ticks, self.ticks_since_last_fall, self.slow_tick_interval,
+                      self.fast_tick_interval, self.fast_drop_lockout_ticks],
+            'flags': [self.fast_drop_active, self.fast_drop_locked, self.rows_dirty, self.game_over],
+        }
+
+    def restore(self, state: dict):
+        if 'rules' in state:
+            self.check_rules(state['rules'])
+        types = {piece_type.name: piece_type for piece_type in self.pieces}
+        self.seed = state['seed']
+        version, internal, gauss = state['rng']
+        self.rng.setstate((version, tuple(internal), gauss))
+
+        self.board.reset()
+        by_color = {}
+        for gx, gy, color in state['board']:
+            by_color.setdefault(tuple(color), []).append((gx, gy))
+        for color, cells in by_color.items():
+            self.board.place(cells, color)
+
+        name, rotation, gx, gy = state['piece']
+        self.piece = types[name](gx, gy)
+        self.piece.rotation = rotation
+        self.next_piece = types[state['next_piece']]
+
+        score = self.score
+        (score.current_level, score.current_score, score.rows_cleared,
+         score.total_rows_cleared, stats) = state['score']
+        score.stats.update(stats)
+        (self.ticks, self.ticks_since_last_fall, self.slow_tick_interval,
+         self.fast_tick_interval, self.fast_drop_lockout_ticks) = state['ticks']
+        self.fast_drop_active, self.fast_drop_locked, self.rows_dirty, self.game_over = state['flags']
+        self.events = []
+        self.placed = []
+        self.cleared_rows = []
+
+    def step(self, inputs: int = 0) -> list:
+        self.events = []
+        if self.placed:
+            self.placed = []
+        if self.cleared_rows:
+            self.cleared_rows = []
+        if self.game_over:
+            return self.events
+
+        self.process_completed_rows()
+        self.check_level()
+
+        if inputs & DOWN:
+            if not self.fast_drop_locked:
+                self.soft_drop()
+                self.fast_drop_active = True
+        else:
+            self.fast_drop_locked = False
+            self.fast_drop_active = False
+        if self.game_over:
+            return self.events
+        if inputs & UP:
+            self.rotate()
+        if inputs & LEFT:
+            for _ in range(1 + (inputs >> LEFT_REPEATS & REPEAT_MASK)):
+                if not self.shift(-1):
+                    break
+        if inputs & RIGHT:
+            for _ in range(1 + (inputs >> RIGHT_REPEATS & REPEAT_MASK)):
+                if not self.shift(1):
+                    break
+
+        self.maybe_fall()
+        self.ticks_since_last_fall += 1
+        self.ticks += 1
+        return self.events
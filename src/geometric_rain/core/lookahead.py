@@ -0,0 +1,236 @@
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from geometric_rain.config import Conf
+from geometric_rain.core.game import GameCore
+from geometric_rain.core.pieces import registry
+from geometric_rain.core.search import PlacementSearch, Placement, Autoplayer
+
+
+# one search per worker process, rebuilt only when the weights change
+_search: PlacementSearch | None = None
+
+
+def pack_rows(rows: list, width: int) -> bytes:
+    """
+    row masks as (width + 7) // 8 little-endian bytes each, for any width
+    :return:
+    """
+    row_bytes = (width + 7) // 8
+    return b''.join(row.to_bytes(row_bytes, 'little') for row in rows)
+
+
+def unpack_rows(packed: bytes, width: int) -> list:
+    row_bytes = (width + 7) // 8
+    return [int.from_bytes(packed[i:i + row_bytes], 'little') for i in range(0, len(packed), row_bytes)]
+
+
+def best_followup(packed: bytes, width: int, piece_name: str, weights: dict) -> float | None:
+    """
+    the score of the best placement of the named piece from its spawn on a
+    board packed by pack_rows, or None if it can't spawn
+    :return:
+    """
+    global _search
+    if _search is None or _search.weights != weights:
+        _search = PlacementSearch(weights)
+    rows = unpack_rows(packed, width)
+    piece_type = registry[piece_name]
+    best = _search.best(rows, width, piece_type, (0, piece_type.spawn_x, 0))
+    return None if best is None else best.score
+
+
+def warm_worker(weights: dict):
+    """
+    build the worker's search up front, so the first expansion it's sent
+    doesn't pay for it
+    :return:
+    """
+    global _search
+    if _search is None or _search.weights != weights:
+        _search = PlacementSearch(weights)
+
+
+def pool_context():
+    """
+    workers start from a fresh interpreter, never a fork of one holding sdl,
+    a window and the mixer threads.  forkserver does that for one spawn's cost
+    :return:
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+class Lookahead:
+    """
+    a BeamPlanner choice with its expansions out on the pool.  greedy is the
+    best placement on its own, there to play while the rest comes back;
+    done() is true once every expansion has, or the time budget has run out
+    """
+
+    def __init__(self, placements: list, futures: dict, deadline: float, lines_weight: float):
+        self.placements = placements
+        self.greedy: Placement | None = placements[0] if placements else None
+        self.futures = futures
+        self.deadline = deadline
+        self.lines_weight = lines_weight
+
+    def done(self) -> bool:
+        return time.perf_counter() >= self.deadline or all(future.done() for future in self.futures)
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
+
+    def result(self) -> tuple:
+        """
+        wait out the time budget for the expansions still running, then pick
+        :return: (placement, expanded, timed out)
+        """
+        remaining = self.deadline - time.perf_counter()
+        if remaining > 0:
+            wait(self.futures, timeout=remaining)
+        values = {self.futures[future]: future.result() for future in self.futures
+                  if future.done() and not future.cancelled()}
+        self.cancel()
+        return rank(self.placements, values, self.lines_weight), len(values), len(self.futures) - len(values)
+
+
+def rank(placements: list, values: dict, lines_weight: float) -> Placement | None:
+    """
+    the best of placements, given the next piece's best score after each
+    expanded one in values.  expanded placements rank above ones the budget
+    cut off, which rank above ones the next piece couldn't spawn on
+    :return:
+    """
+    if not placements:
+        return None
+
+    def value(placement: Placement) -> tuple:
+        if placement not in values:
+            return 0, placement.score
+        followup = values[placement]
+        if followup is None:
+            return -1, placement.score
+        return 1, lines_weight * placement.cleared + followup
+
+    return max(placements, key=value)
+
+
+class BeamPlanner:
+    """
+    picks the current piece's placement by looking at the next piece too.
+    every placement of the current piece is scored as the greedy search
+    would, and the best beam_width of them are expanded: each is worth its
+    lines plus the best score the next piece can reach on the board it
+    leaves.  the expansions run on a process pool, boards sent as packed
+    row masks (pack_rows, any width), and whatever hasn't come back when
+    the time budget runs out keeps its one-piece score, so a busy machine
+    plays greedier rather than slower.  with no workers the expansions run in this process, in beam
+    order, until the budget is spent, sharing the search's transposition
+    tables; each worker keeps tables of its own
+    """
+
+    def __init__(self, search: PlacementSearch = None, beam_width: int = None, workers: int = None,
+                 time_budget: float = None):
+        self.search = search or PlacementSearch()
+        self.beam_width: int = Conf.autoplay_beam_width if beam_width is None else beam_width
+        self.time_budget: float = Conf.autoplay_time_budget if time_budget is None else time_budget
+        workers = Conf.autoplay_workers if workers is None else workers
+        self.pool = None
+        if workers:
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+            for _ in range(workers):
+                self.pool.submit(warm_worker, self.search.weights)
+        self.expanded: int = 0
+        self.timed_out: int = 0
+
+    def submit(self, rows: list, width: int, piece_type, next_type, start: tuple) -> Lookahead:
+        """
+        score the current piece's placements and send the best beam_width
+        out to be expanded, without waiting on them
+        :return:
+        """
+        deadline = time.perf_counter() + self.time_budget
+        placements = sorted(self.search.placements(rows, width, piece_type, start),
+                            key=lambda placement: placement.score, reverse=True)
+        futures = {}
+        if next_type is not None:
+            futures = {self.pool.submit(best_followup, pack_rows(placement.rows, width), width,
+                                        next_type.name, self.search.weights): placement
+                       for placement in placements[:self.beam_width]}
+        return Lookahead(placements, futures, deadline, self.search.weights['lines'])
+
+    def collect(self, lookahead: Lookahead) -> Placement | None:
+        placement, expanded, timed_out = lookahead.result()
+        self.expanded += expanded
+        self.timed_out += timed_out
+        return placement
+
+    def choose(self, rows: list, width: int, piece_type, next_type, start: tuple) -> Placement | None:
+        if self.pool is not None:
+            return self.collect(self.submit(rows, width, piece_type, next_type, start))
+        deadline = time.perf_counter() + self.time_budget
+        placements = sorted(self.search.placements(rows, width, piece_type, start),
+                            key=lambda placement: placement.score, reverse=True)
+        if not placements or next_type is None:
+            return placements[0] if placements else None
+        beam = placements[:self.beam_width]
+        values = {}
+        for placement in beam:
+            if time.perf_counter() >= deadline:
+                break
+            best = self.search.best(placement.rows, width, next_type, (0, next_type.spawn_x, 0), placement.hash)
+            values[placement] = None if best is None else best.score
+        self.expanded += len(values)
+        self.timed_out += len(beam) - len(values)
+        return rank(placements, values, self.search.weights['lines'])
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class LookaheadPlayer(Autoplayer):
+    """
+    the autoplayer, choosing each placement with a BeamPlanner over the
+    current and next pieces.  with a pool the tick never waits on it: a new
+    piece heads for its greedy placement straight away while the expansions
+    run, and is steered to the planner's pick on the first tick after they
+    are all back or the budget is up, if it can still get there
+    """
+
+    def __init__(self, planner: BeamPlanner = None):
+        self.planner = planner or BeamPlanner()
+        self.lookahead: Lookahead | None = None
+        # the board the lookahead in flight was planned on
+        self.rows: list = []
+        super().__init__(self.planner.search)
+
+    def choose(self, core: GameCore, rows: list, start: tuple) -> Placement | None:
+        if self.planner.pool is None:
+            return self.planner.choose(rows, core.board.width, core.piece.type, core.next_piece, start)
+        if self.lookahead is not None:
+            self.lookahead.cancel()
+        self.lookahead = self.planner.submit(rows, core.board.width, core.piece.type, core.next_piece, start)
+        self.rows = rows
+        return self.lookahead.greedy
+
+    def __call__(self, core: GameCore) -> int:
+        lookahead = self.lookahead
+        if lookahead is not None and core.piece is self.piece and lookahead.done():
+            self.lookahead = None
+            placement = self.planner.collect(lookahead)
+            if placement is not None and placement.state != self.target:
+                piece = core.piece
+                paths = self.search.reachable(self.rows, core.board.width, piece.type,
+                                              (piece.rotation, piece.gx, piece.gy))
+                if placement.state in paths:
+                    self.target = placement.state
+                    self.follow(paths[placement.state])
+        return super().__call__(core)
+
+    def shutdown(self):
+        if self.lookahead is not None:
+            self.lookahead.cancel()
+        self.planner.shutdown()
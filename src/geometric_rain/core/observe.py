@@ -0,0 +1,80 @@
+import numpy as np
+from geometric_rain.core.game import GameCore
+
+
+# the order of Observation's counters
+COUNTERS = ('score', 'level', 'lines')
+
+
+def read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class Observation:
+    """
+    a GameCore's state in numpy buffers allocated once and refilled in place
+    by update(), for agents that read it every tick.  what it hands out are
+    read-only views of those buffers, so they change under the caller on the
+    next update; copy anything that's to be kept.
+
+    board is 1 where a block has settled and colors the board's palette id
+    of each cell, piece is 1 under the active piece, piece_cells its (gx, gy)
+    cells, next_piece one-hot over core.pieces, and counters the score,
+    level and lines cleared in COUNTERS order.  heights, holes, wells and
+    row_counts wrap the board's own BoardFeatures.  the board is only copied
+    out when it has changed since the last update
+    """
+
+    def __init__(self, core: GameCore):
+        self.core = core
+        board = core.board
+        shape = (board.height, board.width)
+        self._board = np.zeros(shape, dtype=np.uint8)
+        self._colors = np.zeros(shape, dtype=np.uint8)
+        self._piece = np.zeros(shape, dtype=np.uint8)
+        self._piece_cells = np.zeros((max(len(piece_type.rotations[0].offsets) for piece_type in core.pieces), 2),
+                                     dtype=np.int16)
+        self._next_piece = np.zeros(len(core.pieces), dtype=np.uint8)
+        self._counters = np.zeros(len(COUNTERS), dtype=np.int64)
+        self.piece_index: dict = {piece_type.name: i for i, piece_type in enumerate(core.pieces)}
+        self.board_version = None
+        self.drawn_cells: list = []
+        features = board.features
+        self.views: dict = {
+            'board': read_only(self._board),
+            'colors': read_only(self._colors),
+            'piece': read_only(self._piece),
+            'piece_cells': read_only(self._piece_cells[:0]),
+            'next_piece': read_only(self._next_piece),
+            'counters': read_only(self._counters),
+            'heights': np.frombuffer(features.heights, dtype=np.int32),
+            'holes': np.frombuffer(features.holes, dtype=np.int32),
+            'wells': np.frombuffer(features.wells, dtype=np.int32),
+            'row_counts': np.frombuffer(features.row_counts, dtype=np.int32),
+        }
+
+    def update(self) -> dict:
+        core = self.core
+        board = core.board
+        if board.features.version != self.board_version:
+            self._colors[:] = board.color_ids()
+            np.not_equal(self._colors, 0, out=self._board, casting='unsafe')
+            self.board_version = board.features.version
+
+        piece = self._piece
+        for gx, gy in self.drawn_cells:
+            piece[gy, gx] = 0
+        cells = [(gx, gy) for gx, gy in core.piece.cells() if not board.out_of_bounds(gx, gy)]
+        for gx, gy in cells:
+            piece[gy, gx] = 1
+        self.drawn_cells = cells
+        self._piece_cells[:len(cells)] = cells
+        self.views['piece_cells'] = read_only(self._piece_cells[:len(cells)])
+
+        self._next_piece.fill(0)
+        self._next_piece[self.piece_index[core.next_piece.name]] = 1
+        score = core.score
+        self._counters[:] = (score.current_score, score.current_level, score.total_rows_cleared)
+        return self.views
@@ -0,0 +1,163 @@
+import json
+from geometric_rain.config import Conf
+
+
+
+class Rotation:
+    """
+    one precomputed orientation of a piece type.  offsets are the (ox, oy)
+    cells of the shape matrix, bbox is (left, top, right, bottom) of those
+    cells inside the matrix, and gw/gh are the bbox size in blocks.
+    row_masks are (oy, bits) per occupied row for bitboards, with bit 0 at
+    the bbox's left column
+    """
+    __slots__ = ('index', 'shape', 'offsets', 'bbox', 'gw', 'gh', 'spawn_x', 'row_masks')
+
+    def __init__(self, index: int, shape: list, spawn_x: int):
+        self.index = index
+        self.shape = tuple(tuple(row) for row in shape)
+        self.offsets = tuple((ox, oy)
+                             for oy, row in enumerate(shape)
+                             for ox, populated in enumerate(row)
+                             if populated)
+        xs = [ox for ox, _ in self.offsets]
+        ys = [oy for _, oy in self.offsets]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+        self.gw = self.bbox[2] - self.bbox[0] + 1
+        self.gh = self.bbox[3] - self.bbox[1] + 1
+        self.spawn_x = spawn_x
+        masks = {}
+        for ox, oy in self.offsets:
+            masks[oy] = masks.get(oy, 0) | 1 << (ox - self.bbox[0])
+        self.row_masks = tuple(sorted(masks.items()))
+
+
+class PieceType:
+    """
+    a registered shape with all of its rotations built up front; calling it
+    spawns a Piece the way the old per-shape classes did
+    """
+
+    def __init__(self, name: str, shape: list, color: tuple, spawn_x: int = None):
+        if not shape or any(len(row) != len(shape) for row in shape):
+            raise ValueError(f"Piece '{name}' shape must be a non-empty square matrix")
+        if not any(any(row) for row in shape):
+            raise ValueError(f"Piece '{name}' shape has no blocks")
+        self.name = name
+        self.color = tuple(color)
+        self.spawn_x = (Conf.grid_width - len(shape)) // 2 if spawn_x is None else spawn_x
+        rotations = []
+        for index in range(4):
+            rotations.append(Rotation(index, shape, self.spawn_x))
+            shape = [list(row) for row in zip(*shape[::-1])]
+        self.rotations = tuple(rotations)
+        self.shape = self.rotations[0].shape
+        self.gw = self.rotations[0].gw
+        self.gh = self.rotations[0].gh
+
+    def __call__(self, gx: int = None, gy: int = 0) -> 'Piece':
+        return Piece(self, gx, gy)
+
+    def __repr__(self):
+        return f"PieceType({self.name!r})"
+
+
+class Piece:
+    """
+    a live piece in grid coordinates only.  rotating just moves the index
+    into the type's precomputed rotations
+    """
+    __slots__ = ('type', 'rotation', 'gx', 'gy')
+
+    def __init__(self, piece_type: PieceType, gx: int = None, gy: int = 0):
+        self.type = piece_type
+        self.rotation = 0
+        self.gx = piece_type.spawn_x if gx is None else gx
+        self.gy = gy
+
+    @property
+    def name(self) -> str:
+        return self.type.name
+
+    @property
+    def color(self) -> tuple:
+        return self.type.color
+
+    @property
+    def state(self) -> Rotation:
+        return self.type.rotations[self.rotation]
+
+    @property
+    def offsets(self) -> tuple:
+        return self.type.rotations[self.rotation].offsets
+
+    @property
+    def gw(self) -> int:
+        return self.state.gw
+
+    @property
+    def gh(self) -> int:
+        return self.state.gh
+
+    def rotated(self, turns: int = 1) -> int:
+        return (self.rotation + turns) % len(self.type.rotations)
+
+    def cells(self, gx: int = None, gy: int = None, rotation: int = None) -> list:
+        gx = self.gx if gx is None else gx
+        gy = self.gy if gy is None else gy
+        rotation = self.rotation if rotation is None else rotation
+        return [(gx + ox, gy + oy) for ox, oy in self.type.rotations[rotation].offsets]
+
+    def rotate(self, turns: int = 1):
+        self.rotation = self.rotated(turns)
+
+
+class PieceRegistry:
+
+    def __init__(self):
+        self.types: dict = {}
+
+    def __getitem__(self, name: str) -> PieceType:
+        return self.types[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.types
+
+    def __iter__(self):
+        return iter(self.types.values())
+
+    def __len__(self):
+        return len(self.types)
+
+    @property
+    def pieces(self) -> list:
+        return list(self.types.values())
+
+    def register(self, name: str, definition: dict) -> PieceType:
+        shape = definition.get('shape')
+        if not shape:
+            raise ValueError(f"Piece '{name}' had no 'shape' attribute")
+        color = definition.get('color')
+        if not color:
+            raise ValueError(f"Piece '{name}' had no 'color' attribute")
+        piece_type = PieceType(name, shape, color, definition.get('spawn_x'))
+        self.types[name] = piece_type
+        return piece_type
+
+    def load(self, definitions: dict):
+        for name, definition in definitions.items():
+            self.register(name, definition)
+
+    def load_file(self, filepath: str):
+        try:
+            with open(filepath, 'r') as f:
+                definitions = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Error loading piece definitions ({filepath}): {e}")
+        self.load(definitions)
+
+
+registry = PieceRegistry()
+registry.load(Conf.pieces)
+for piece_filepath in Conf.piece_files:
+    registry.load_file(piece_filepath)
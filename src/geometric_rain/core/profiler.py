@@ -0,0 +1,76 @@
+import json
+from time import perf_counter_ns
+from collections import deque
+from functools import wraps
+from geometric_rain.config import Conf
+
+
+
+class Profiler:
+    """
+    times named phases of the frame.  each phase keeps a rolling window of
+    its most recent durations for percentiles, and every timed call is also
+    kept (up to Conf.profile_trace_events) for a chrome trace-event export.
+
+    methods are timed by wrapping them on the instance with instrument(), so
+    nothing is paid on objects that were never instrumented
+    """
+
+    def __init__(self, window: int = None, trace_events: int = None):
+        self.window: int = window or Conf.profile_window
+        self.samples: dict = {}
+        self.trace = deque(maxlen=trace_events or Conf.profile_trace_events)
+        self.origin_ns: int = perf_counter_ns()
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(end_ns - start_ns)
+        self.trace.append((name, start_ns, end_ns - start_ns))
+
+    def wrap(self, name: str, func):
+        record = self.record
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start_ns = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start_ns, perf_counter_ns())
+        return timed
+
+    def instrument(self, obj, method_names, prefix: str = ''):
+        """
+        replace each bound method on obj with a timed one, recorded as prefix + name
+        :return:
+        """
+        for method_name in method_names:
+            setattr(obj, method_name, self.wrap(prefix + method_name, getattr(obj, method_name)))
+
+    def percentiles(self, name: str, points=(50, 95, 99)) -> tuple:
+        """
+        percentiles of the phase's rolling window, in milliseconds
+        :return:
+        """
+        ordered = sorted(self.samples.get(name, ()))
+        if not ordered:
+            return tuple(0.0 for _ in points)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, round(last * point / 100))] / 1e6 for point in points)
+
+    def summary(self) -> list:
+        return [(name, *self.percentiles(name)) for name in self.samples]
+
+    def export_chrome_trace(self, filepath: str):
+        events = [{
+            'name': name,
+            'ph': 'X',
+            'ts': (start_ns - self.origin_ns) / 1000,
+            'dur': duration_ns / 1000,
+            'pid': 0,
+            'tid': 0,
+        } for name, start_ns, duration_ns in self.trace]
+        with open(filepath, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,287 @@
+import mmap
+import zlib
+import json
+import struct
+from bisect import bisect_right
+from geometric_rain.config import Conf
+from geometric_rain.core.game import GameCore
+
+
+# magic, format version, seed, then the final score, rows, level and tick
+# count the game ended with, and the number of input runs that follow.  from
+# version 2 the header is followed by the length of the game's rules and the
+# rules as json (GameCore.rules), then the runs
+HEADER = struct.Struct('<4sBQQIIII')
+MAGIC = b'GRIL'
+VERSION = 2
+
+# a keyframed archive is this header, the length of the input log and the
+# log itself, a zlib-compressed json snapshot per keyframe, then an index of
+# (tick, offset, length) per keyframe and a trailer pointing at the index, so
+# a reader can find everything from the end of the file
+ARCHIVE_HEADER = struct.Struct('<4sBI')
+ARCHIVE_INDEX_ENTRY = struct.Struct('<QQI')
+ARCHIVE_TRAILER = struct.Struct('<QI4s')
+ARCHIVE_MAGIC = b'GRRA'
+ARCHIVE_VERSION = 1
+
+
+def write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset: int) -> tuple:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class InputLog:
+    """
+    everything needed to reproduce a game: its seed, the rules it was
+    played under, and the input bits GameCore.step got on every tick,
+    run-length encoded as (inputs, ticks) pairs.  the final score, rows and
+    level are kept to check a replay against.  logs from before rules were
+    recorded have None, and are played under the current Conf
+    """
+
+    def __init__(self, seed: int, rules: dict = None):
+        self.seed = seed
+        self.rules = rules
+        self.runs: list = []
+        self.ticks: int = 0
+        self.score: int = 0
+        self.rows: int = 0
+        self.level: int = 0
+
+    def record(self, inputs: int):
+        if self.runs and self.runs[-1][0] == inputs:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([inputs, 1])
+        self.ticks += 1
+
+    def finish(self, score):
+        self.score = score.current_score
+        self.rows = score.total_rows_cleared
+        self.level = score.current_level
+
+    def __iter__(self):
+        for inputs, length in self.runs:
+            for _ in range(length):
+                yield inputs
+
+    def inputs_between(self, start: int, stop: int):
+        """
+        the inputs of ticks start up to (not including) stop, as (inputs, ticks) runs
+        :return:
+        """
+        tick = 0
+        for inputs, length in self.runs:
+            end = tick + length
+            if end > start:
+                yield inputs, min(end, stop) - max(tick, start)
+            if end >= stop:
+                return
+            tick = end
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.score,
+                                    self.rows, self.level, self.ticks, len(self.runs)))
+        rules = json.dumps(self.rules, separators=(',', ':')).encode()
+        write_varint(out, len(rules))
+        out += rules
+        for inputs, length in self.runs:
+            write_varint(out, inputs)
+            write_varint(out, length)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'InputLog':
+        if len(data) < HEADER.size:
+            raise ValueError('Input log is truncated')
+        magic, version, seed, score, rows, level, ticks, run_count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Not a Geometric Rain input log')
+        if version not in (1, VERSION):
+            raise ValueError(f"Unsupported input log version {version}")
+        log = cls(seed)
+        offset = HEADER.size
+        if version >= 2:
+            length, offset = read_varint(data, offset)
+            log.rules = json.loads(bytes(data[offset:offset + length]))
+            offset += length
+        for _ in range(run_count):
+            inputs, offset = read_varint(data, offset)
+            length, offset = read_varint(data, offset)
+            log.runs.append([inputs, length])
+        log.ticks = sum(length for _, length in log.runs)
+        if log.ticks != ticks:
+            raise ValueError(f"Input log holds {log.ticks} ticks, header says {ticks}")
+        log.score, log.rows, log.level = score, rows, level
+        return log
+
+    def save(self, filepath: str):
+        with open(filepath, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filepath: str) -> 'InputLog':
+        with open(filepath, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """
+    records a game's inputs like InputLog, and every Conf.replay_keyframe_interval
+    ticks a snapshot of the core, so a viewer can seek without re-simulating
+    from the start.  record() is called with each tick's inputs before the
+    core steps, so a keyframe at tick t is the state after t steps
+    """
+
+    def __init__(self, core: GameCore, keyframe_interval: int = None):
+        self.core = core
+        self.keyframe_interval: int = keyframe_interval or Conf.replay_keyframe_interval
+        self.log = InputLog(core.seed, core.rules())
+        self.keyframes: list = []
+
+    def record(self, inputs: int):
+        if self.log.ticks % self.keyframe_interval == 0:
+            snapshot = json.dumps(self.core.snapshot(), separators=(',', ':')).encode()
+            self.keyframes.append((self.log.ticks, zlib.compress(snapshot)))
+        self.log.record(inputs)
+
+    def save(self, filepath: str):
+        self.log.finish(self.core.score)
+        log_bytes = self.log.to_bytes()
+        with open(filepath, 'wb') as f:
+            f.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(log_bytes)))
+            f.write(log_bytes)
+            index = []
+            for tick, blob in self.keyframes:
+                index.append(ARCHIVE_INDEX_ENTRY.pack(tick, f.tell(), len(blob)))
+                f.write(blob)
+            index_offset = f.tell()
+            f.write(b''.join(index))
+            f.write(ARCHIVE_TRAILER.pack(index_offset, len(index), ARCHIVE_MAGIC))
+
+
+class ReplayArchive:
+    """
+    read side of ReplayRecorder.  the file is memory-mapped and only the index
+    is parsed up front; seek() decompresses the one keyframe it needs
+    """
+
+    def __init__(self, filepath: str):
+        with open(filepath, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self.map)
+        if size < ARCHIVE_HEADER.size + ARCHIVE_TRAILER.size:
+            raise ValueError('Replay archive is truncated')
+        magic, version, log_length = ARCHIVE_HEADER.unpack_from(self.map)
+        index_offset, count, trailer_magic = ARCHIVE_TRAILER.unpack_from(self.map, size - ARCHIVE_TRAILER.size)
+        if magic != ARCHIVE_MAGIC or trailer_magic != ARCHIVE_MAGIC:
+            raise ValueError('Not a Geometric Rain replay archive')
+        if version != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported replay archive version {version}")
+        self.log = InputLog.from_bytes(self.map[ARCHIVE_HEADER.size:ARCHIVE_HEADER.size + log_length])
+        self.index = [ARCHIVE_INDEX_ENTRY.unpack_from(self.map, index_offset + i * ARCHIVE_INDEX_ENTRY.size)
+                      for i in range(count)]
+        self.keyframe_ticks = [tick for tick, _, _ in self.index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.map.close()
+
+    def keyframe(self, tick: int) -> tuple:
+        """
+        the nearest keyframe at or before tick
+        :return: (keyframe tick, snapshot)
+        """
+        position = bisect_right(self.keyframe_ticks, tick) - 1
+        if position < 0:
+            raise ValueError(f"Replay archive has no keyframe at or before tick {tick}")
+        keyframe_tick, offset, length = self.index[position]
+        return keyframe_tick, json.loads(zlib.decompress(self.map[offset:offset + length]))
+
+    def seek(self, tick: int, core: GameCore = None) -> GameCore:
+        """
+        the game as it was after tick steps: the nearest keyframe, then only
+        the ticks between it and the target are simulated
+        :return:
+        """
+        if not 0 <= tick <= self.log.ticks:
+            raise ValueError(f"Tick {tick} is outside the replay's 0-{self.log.ticks}")
+        core = core or core_for(self.log)
+        keyframe_tick, snapshot = self.keyframe(tick)
+        core.restore(snapshot)
+        step = core.step
+        for inputs, length in self.log.inputs_between(keyframe_tick, tick):
+            for _ in range(length):
+                step(inputs)
+        return core
+
+
+def load_log(filepath: str) -> InputLog:
+    """
+    the input log from either a bare log or a keyframed archive
+    :return:
+    """
+    with open(filepath, 'rb') as f:
+        magic = f.read(len(ARCHIVE_MAGIC))
+    if magic == ARCHIVE_MAGIC:
+        with ReplayArchive(filepath) as archive:
+            return archive.log
+    return InputLog.load(filepath)
+
+
+def core_for(log: InputLog) -> GameCore:
+    """
+    a core playing by the rules the log was recorded under
+    :return:
+    """
+    return GameCore() if log.rules is None else GameCore.from_rules(log.rules)
+
+
+def replay(log: InputLog, core: GameCore = None) -> GameCore:
+    """
+    run the logged game through a headless core as fast as it will go.  a
+    core that's passed in has to play by the log's rules, or this raises
+    :return:
+    """
+    if core is None:
+        core = core_for(log)
+    elif log.rules is not None:
+        core.check_rules(log.rules)
+    core.reset(log.seed)
+    step = core.step
+    for inputs, length in log.runs:
+        for _ in range(length):
+            step(inputs)
+    return core
+
+
+def verify(log: InputLog, core: GameCore = None) -> tuple:
+    """
+    replay the log and check it ends with the score, rows and level it recorded
+    :return: (matched, core)
+    """
+    core = replay(log, core)
+    score = core.score
+    matched = (score.current_score, score.total_rows_cleared, score.current_level) == \
+              (log.score, log.rows, log.level)
+    return matched, core
@@ -0,0 +1,22 @@
+from geometric_rain.core.pieces import registry
+
+
+
+class Score:
+    rewards = [40, 100, 300, 1200]
+
+    def __init__(self):
+        self.current_level: int = 0
+        self.current_score: int = 0
+        self.top_score: int = 0
+        self.rows_cleared: int = 0
+        self.total_rows_cleared: int = 0
+        self.stats = {name: 0 for name in sorted(registry.types)}
+
+    def reset(self):
+        self.current_level = 0
+        self.current_score = 0
+        self.rows_cleared = 0
+        self.total_rows_cleared = 0
+        for name in self.stats:
+            self.stats[name] = 0
@@ -0,0 +1,328 @@
+from array import array
+from collections import deque
+from geometric_rain.config import Conf
+from geometric_rain.core.game import GameCore, UP, DOWN, shift_inputs
+from geometric_rain.core.zobrist import TranspositionTable, zobrist_for
+
+
+def fits(rows: list, width: int, rotation, gx: int, gy: int) -> bool:
+    """
+    BitBoard.collides_piece, inverted, against a bare list of row masks
+    :return:
+    """
+    left, top, right, bottom = rotation.bbox
+    if gx + left < 0 or gx + right >= width or gy + top < 0 or gy + bottom >= len(rows):
+        return False
+    shift = gx + left
+    for oy, bits in rotation.row_masks:
+        if rows[gy + oy] & (bits << shift):
+            return False
+    return True
+
+
+def clear_full_rows(rows: list, width: int) -> list:
+    """
+    the rows as they'll be once GameCore clears the full ones, which it
+    does on the tick after a piece settles, after the next has spawned
+    :return:
+    """
+    full_mask = (1 << width) - 1
+    kept = [row for row in rows if row != full_mask]
+    return [0] * (len(rows) - len(kept)) + kept
+
+
+def place(rows: list, width: int, rotation, gx: int, gy: int) -> tuple:
+    """
+    the rows with the piece locked in and any full rows cleared
+    :return: (rows, cleared)
+    """
+    rows = list(rows)
+    shift = gx + rotation.bbox[0]
+    for oy, bits in rotation.row_masks:
+        rows[gy + oy] |= bits << shift
+    full_mask = (1 << width) - 1
+    kept = [row for row in rows if row != full_mask]
+    cleared = len(rows) - len(kept)
+    if cleared:
+        rows = [0] * cleared + kept
+    return rows, cleared
+
+
+def features(rows: list, width: int) -> tuple:
+    """
+    (aggregate height, holes, bumpiness) of a board given as row masks.  a
+    hole is an empty cell with a filled one somewhere above it
+    :return:
+    """
+    height = len(rows)
+    heights = [0] * width
+    seen = 0
+    holes = 0
+    for gy, row in enumerate(rows):
+        new = row & ~seen
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = height - gy
+            new ^= low
+        holes += (seen & ~row).bit_count()
+        seen |= row
+    bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(width - 1))
+    return sum(heights), holes, bumpiness
+
+
+class Placement:
+    """
+    a final resting state of a piece: where it locks, the board it leaves
+    and that board's zobrist hash, and the states (rotation, gx, gy) that
+    walk it there from where the search started.  placements rebuilt from
+    the cache have no path; PlacementSearch.reachable finds it again
+    """
+    __slots__ = ('state', 'path', 'rows', 'cleared', 'score', 'hash')
+
+    def __init__(self, state: tuple, path: list, rows: list, cleared: int, score: float, hash: int = 0):
+        self.state = state
+        self.path = path
+        self.rows = rows
+        self.cleared = cleared
+        self.score = score
+        self.hash = hash
+
+
+def pack_placements(placements: list) -> tuple:
+    """
+    placements as the cache keeps them: (rotation, gx, gy, cleared) of each
+    as 32-bit ints, enough for any grid, then their scores and their
+    boards' hashes
+    :return: (moves, scores, hashes)
+    """
+    return (array('i', [value for placement in placements for value in (*placement.state, placement.cleared)]),
+            array('d', [placement.score for placement in placements]),
+            array('Q', [placement.hash for placement in placements]))
+
+
+def unpack_placement(packed: tuple, i: int, rows: list, width: int, piece_type) -> Placement:
+    moves, scores, hashes = packed
+    rotation, gx, gy, cleared = moves[i * 4:i * 4 + 4]
+    placed, _ = place(rows, width, piece_type.rotations[rotation], gx, gy)
+    return Placement((rotation, gx, gy), None, placed, cleared, scores[i], hashes[i])
+
+
+class PlacementSearch:
+    """
+    every placement a piece can reach from where it is, found by a breadth
+    first search over (rotation, gx, gy) with the moves the game allows:
+    rotate clockwise, shift left or right, and drop a row.  so slides under
+    overhangs (tucks) and rotations into slots (spins) are found along with
+    plain drops.  each placement is scored by weighting the features of the
+    board it leaves, Conf.autoplay_weights by default.
+
+    boards are keyed by zobrist hash: self.scores holds each board's score
+    less its lines, and self.placement_cache every placement found for a
+    (board, piece, start), so a board reached again, by another order of
+    moves or another branch of a lookahead, isn't searched or scored twice.
+    the cache keeps placements packed, as where each locks, its score and
+    its board's hash, and rebuilds the boards when one's asked for again
+    """
+
+    def __init__(self, weights: dict = None):
+        self.weights: dict = dict(weights or Conf.autoplay_weights)
+        self.scores = TranspositionTable(Conf.transposition_table_size)
+        self.placement_cache = TranspositionTable(Conf.placement_table_size)
+        self.evaluations: int = 0
+
+    def evaluate(self, rows: list, width: int, cleared: int, key: int = None) -> float:
+        value = None if key is None else self.scores.get(key)
+        if value is None:
+            aggregate_height, holes, bumpiness = features(rows, width)
+            weights = self.weights
+            value = (weights['aggregate_height'] * aggregate_height
+                     + weights['holes'] * holes
+                     + weights['bumpiness'] * bumpiness)
+            self.evaluations += 1
+            if key is not None:
+                self.scores.put(key, value)
+        return self.weights['lines'] * cleared + value
+
+    def reachable(self, rows: list, width: int, piece_type, start: tuple) -> dict:
+        """
+        every state a piece can lock in, mapped to the path of states from
+        start.  the search goes a row at a time, every rotation and shift on
+        a row before any drop to the next, so paths make their moves as high
+        up as they can and only tuck or spin once they've dropped
+        :return:
+        """
+        rotations = piece_type.rotations
+        turns = len(rotations)
+        parents = {start: None}
+        entries = [start]
+        finals = []
+        while entries:
+            queue = deque(entries)
+            row_states = []
+            while queue:
+                state = queue.popleft()
+                row_states.append(state)
+                rotation, gx, gy = state
+                for move in (((rotation + 1) % turns, gx, gy), (rotation, gx - 1, gy), (rotation, gx + 1, gy)):
+                    if move not in parents and fits(rows, width, rotations[move[0]], move[1], move[2]):
+                        parents[move] = state
+                        queue.append(move)
+            entries = []
+            for state in row_states:
+                rotation, gx, gy = state
+                below = (rotation, gx, gy + 1)
+                if fits(rows, width, rotations[rotation], gx, gy + 1):
+                    if below not in parents:
+                        parents[below] = state
+                        entries.append(below)
+                else:
+                    finals.append(state)
+        paths = {}
+        for state in finals:
+            path = []
+            step = state
+            while step is not None:
+                path.append(step)
+                step = parents[step]
+            paths[state] = path[::-1]
+        return paths
+
+    def placements(self, rows: list, width: int, piece_type, start: tuple, key: int = None) -> list:
+        """
+        every reachable placement, scored, one per distinct set of cells.
+        key is the board's zobrist hash, worked out from rows if not given
+        :return:
+        """
+        key = zobrist_for(width, len(rows)).hash_rows(rows) if key is None else key
+        packed = self.placement_cache.get((key, piece_type.name, start))
+        if packed is None:
+            return self._search(rows, width, piece_type, start, key)
+        return [unpack_placement(packed, i, rows, width, piece_type) for i in range(len(packed[1]))]
+
+    def best(self, rows: list, width: int, piece_type, start: tuple, key: int = None) -> Placement | None:
+        key = zobrist_for(width, len(rows)).hash_rows(rows) if key is None else key
+        packed = self.placement_cache.get((key, piece_type.name, start))
+        if packed is None:
+            return max(self._search(rows, width, piece_type, start, key), key=lambda placement: placement.score,
+                       default=None)
+        scores = packed[1]
+        if not scores:
+            return None
+        return unpack_placement(packed, max(range(len(scores)), key=scores.__getitem__), rows, width, piece_type)
+
+    def _search(self, rows: list, width: int, piece_type, start: tuple, key: int) -> list:
+        zobrist = zobrist_for(width, len(rows))
+        results = []
+        footprints = set()
+        rotations = piece_type.rotations
+        for state, path in self.reachable(rows, width, piece_type, start).items():
+            rotation, gx, gy = state
+            footprint = tuple((gy + oy, bits << (gx + rotations[rotation].bbox[0]))
+                              for oy, bits in rotations[rotation].row_masks)
+            if footprint in footprints:
+                continue
+            footprints.add(footprint)
+            placed, cleared = place(rows, width, rotations[rotation], gx, gy)
+            # a clear shifts every row above the lowest one the piece touched
+            touched = range(gy + rotations[rotation].bbox[3] + 1) if cleared else [row for row, _ in footprint]
+            placed_key = zobrist.update(key, rows, placed, touched)
+            results.append(Placement(state, path, placed, cleared, self.evaluate(placed, width, cleared, placed_key),
+                                     placed_key))
+        self.placement_cache.put((key, piece_type.name, start), pack_placements(results))
+        return results
+
+    def stats(self) -> dict:
+        return {
+            'evaluations': self.evaluations,
+            'scores': self.scores.stats(),
+            'placements': self.placement_cache.stats(),
+        }
+
+
+class Autoplayer:
+    """
+    plays a GameCore by searching for the best placement of each new piece
+    and returning the input bits that walk it there, one tick at a time.  it
+    has the same shape as a bench policy, a callable from a core to inputs.
+    rotation and shifts are sent as soon as they're possible, drops under
+    an overhang are left to gravity, and DOWN is only held once nothing but
+    the drop is left.  if the piece ends up off the path, gravity having
+    pulled it down mid-shift, the path is searched again from where it is
+    """
+
+    def __init__(self, search: PlacementSearch = None):
+        self.search = search or PlacementSearch()
+        self.piece = None
+        self.target = None
+        self.path: list = []
+        self.index: dict = {}
+
+    def plan(self, core: GameCore, start: tuple):
+        width = core.board.width
+        rows = clear_full_rows(core.board.occupancy(), width)
+        piece_type = core.piece.type
+        if self.target is not None:
+            paths = self.search.reachable(rows, width, piece_type, start)
+            if self.target in paths:
+                self.follow(paths[self.target])
+                return
+        placement = self.choose(core, rows, start)
+        if placement is None:
+            self.target = None
+            self.follow([start])
+        else:
+            self.target = placement.state
+            self.follow(placement.path or self.search.reachable(rows, width, piece_type, start)[placement.state])
+
+    def choose(self, core: GameCore, rows: list, start: tuple) -> Placement | None:
+        return self.search.best(rows, core.board.width, core.piece.type, start)
+
+    def stats(self) -> dict:
+        return self.search.stats()
+
+    def shutdown(self):
+        ...
+
+    def follow(self, path: list):
+        self.path = path
+        self.index = {state: i for i, state in enumerate(path)}
+
+    def __call__(self, core: GameCore) -> int:
+        piece = core.piece
+        state = (piece.rotation, piece.gx, piece.gy)
+        if piece is not self.piece:
+            self.piece = piece
+            self.target = None
+            self.plan(core, state)
+        elif state not in self.index:
+            self.plan(core, state)
+        return self.inputs(self.index[state])
+
+    def inputs(self, i: int) -> int:
+        path = self.path
+        rotation, gx, gy = path[i]
+        final_rotation, final_gx, _ = path[-1]
+        if rotation == final_rotation and gx == final_gx and all(step[2] > path[j][2]
+                                                                 for j, step in enumerate(path[i + 1:], i)):
+            return DOWN
+        inputs = 0
+        if path[i + 1][0] != rotation:
+            inputs |= UP
+            i += 1
+        elif path[i + 1][2] != gy:
+            return 0
+        shifts = 0
+        direction = 0
+        while i + 1 < len(path):
+            next_rotation, next_gx, next_gy = path[i + 1]
+            step = next_gx - path[i][1]
+            if next_rotation != path[i][0] or next_gy != gy or not step or (direction and step != direction):
+                break
+            direction = step
+            shifts += 1
+            i += 1
+        if direction < 0:
+            inputs |= shift_inputs(left=shifts)
+        elif direction > 0:
+            inputs |= shift_inputs(right=shifts)
+        return inputs
@@ -0,0 +1,224 @@
+import numpy as np
+from geometric_rain.config import Conf
+from geometric_rain.core.score import Score
+from geometric_rain.core.game import LEFT, RIGHT, UP, DOWN, LEFT_REPEATS, RIGHT_REPEATS, REPEAT_MASK
+from geometric_rain.core.pieces import registry
+
+
+
+class VecGame:
+    """
+    n independent games stepped together.  the boards live in one
+    (n, grid_height, grid_width) uint8 array where each cell holds 0 when
+    empty, otherwise the index of the piece that settled there plus one.
+    step() follows GameCore.step for every board at once, and any board that
+    tops out is reset in place before step returns
+    """
+
+    def __init__(self, n: int, pieces: list = None, seed: int = None,
+                 width: int = None, height: int = None):
+        self.n = n
+        self.width: int = width or Conf.grid_width
+        self.height: int = height or Conf.grid_height
+        self.pieces = pieces or registry.pieces
+        self.rng = np.random.default_rng(seed)
+        self._build_piece_tables()
+
+        self.cells = np.zeros((n, self.height, self.width), dtype=np.uint8)
+        self.piece = np.zeros(n, dtype=np.int64)
+        self.next_piece = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.gx = np.zeros(n, dtype=np.int64)
+        self.gy = np.zeros(n, dtype=np.int64)
+
+        self.current_score = np.zeros(n, dtype=np.int64)
+        self.current_level = np.zeros(n, dtype=np.int64)
+        self.rows_cleared = np.zeros(n, dtype=np.int64)
+        self.total_rows_cleared = np.zeros(n, dtype=np.int64)
+        self.stats = np.zeros((n, len(self.pieces)), dtype=np.int64)
+
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.ticks_since_last_fall = np.zeros(n, dtype=np.int64)
+        self.slow_tick_interval = np.zeros(n, dtype=np.int64)
+        self.fast_drop_active = np.zeros(n, dtype=bool)
+        self.fast_drop_locked = np.zeros(n, dtype=bool)
+        self.fast_drop_lockout_ticks = np.zeros(n, dtype=np.int64)
+        self.rows_dirty = np.zeros(n, dtype=bool)
+        self.game_over = np.zeros(n, dtype=bool)
+
+        self.rewards = np.asarray(Score.rewards, dtype=np.int64)
+        self.reset()
+
+    def _build_piece_tables(self):
+        """
+        cell offsets for every (piece, rotation), padded out to the largest
+        piece so they index as one (pieces, 4, cells) array
+        """
+        states = [[rotation.offsets for rotation in piece.rotations]
+                  for piece in self.pieces]
+        max_cells = max(len(offsets) for rotations in states for offsets in rotations)
+        shape = (len(self.pieces), 4, max_cells)
+        self.offsets_x = np.zeros(shape, dtype=np.int64)
+        self.offsets_y = np.zeros(shape, dtype=np.int64)
+        self.offsets_valid = np.zeros(shape, dtype=bool)
+        for p, rotations in enumerate(states):
+            for r, offsets in enumerate(rotations):
+                for k, (ox, oy) in enumerate(offsets):
+                    self.offsets_x[p, r, k] = ox
+                    self.offsets_y[p, r, k] = oy
+                    self.offsets_valid[p, r, k] = True
+        self.spawn_x = np.array([piece.spawn_x for piece in self.pieces], dtype=np.int64)
+        self.palette = [None] + [piece.color for piece in self.pieces]
+
+    def _cells(self, piece, rotation, gx, gy):
+        xs = gx[:, None] + self.offsets_x[piece, rotation]
+        ys = gy[:, None] + self.offsets_y[piece, rotation]
+        return xs, ys, self.offsets_valid[piece, rotation]
+
+    def collides(self, idx, piece, rotation, gx, gy) -> np.ndarray:
+        xs, ys, valid = self._cells(piece, rotation, gx, gy)
+        out = (xs < 0) | (xs >= self.width) | (ys < 0) | (ys >= self.height)
+        hit = self.cells[idx[:, None],
+                         np.clip(ys, 0, self.height - 1),
+                         np.clip(xs, 0, self.width - 1)] != 0
+        return ((out | hit) & valid).any(axis=1)
+
+    def reset(self, mask: np.ndarray = None):
+        idx = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        if not len(idx):
+            return
+        self.cells[idx] = 0
+        for counter in (self.current_score, self.current_level, self.rows_cleared,
+                        self.total_rows_cleared, self.stats, self.ticks,
+                        self.ticks_since_last_fall, self.fast_drop_lockout_ticks):
+            counter[idx] = 0
+        for flag in (self.fast_drop_active, self.fast_drop_locked,
+                     self.rows_dirty, self.game_over):
+            flag[idx] = False
+        self.slow_tick_interval[idx] = Conf.fall_frames_interval
+        self.next_piece[idx] = self.rng.integers(len(self.pieces), size=len(idx))
+        self._spawn(idx)
+
+    def _spawn(self, idx):
+        self.piece[idx] = self.next_piece[idx]
+        self.next_piece[idx] = self.rng.integers(len(self.pieces), size=len(idx))
+        self.rotation[idx] = 0
+        self.gx[idx] = self.spawn_x[self.piece[idx]]
+        self.gy[idx] = 0
+        self.stats[idx, self.piece[idx]] += 1
+        self.game_over[idx] |= self.collides(idx, self.piece[idx], self.rotation[idx],
+                                             self.gx[idx], self.gy[idx])
+
+    def _settle(self, idx):
+        xs, ys, valid = self._cells(self.piece[idx], self.rotation[idx],
+                                    self.gx[idx], self.gy[idx])
+        boards = np.broadcast_to(idx[:, None], xs.shape)
+        self.cells[boards[valid], ys[valid], xs[valid]] = np.broadcast_to(
+            (self.piece[idx] + 1)[:, None], xs.shape)[valid]
+        self.rows_dirty[idx] = True
+        self.fast_drop_active[idx] = False
+        self.fast_drop_locked[idx] = True
+        self.fast_drop_lockout_ticks[idx] = 0
+        self._spawn(idx)
+
+    def _maybe_fall(self, mask):
+        locked = mask & self.fast_drop_locked
+        self.fast_drop_lockout_ticks[locked] += 1
+        released = locked & (self.fast_drop_lockout_ticks >= Conf.fast_fall_lockout_ticks)
+        self.fast_drop_locked[released] = False
+        self.fast_drop_lockout_ticks[released] = 0
+
+        falling = mask & ((self.ticks_since_last_fall >= self.slow_tick_interval) | self.fast_drop_active)
+        idx = np.flatnonzero(falling)
+        if not len(idx):
+            return
+        blocked = self.collides(idx, self.piece[idx], self.rotation[idx],
+                                self.gx[idx], self.gy[idx] + 1)
+        moved = idx[~blocked]
+        self.gy[moved] += 1
+        self.current_score[moved] += np.where(self.fast_drop_active[moved], 2, 1)
+        self._settle(idx[blocked])
+        self.ticks_since_last_fall[idx] = 0
+
+    def _shift(self, mask, drotation: int = 0, dgx: int = 0):
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            return
+        rotation = (self.rotation[idx] + drotation) % 4
+        gx = self.gx[idx] + dgx
+        ok = ~self.collides(idx, self.piece[idx], rotation, gx, self.gy[idx])
+        self.rotation[idx[ok]] = rotation[ok]
+        self.gx[idx[ok]] = gx[ok]
+
+    def process_completed_rows(self):
+        idx = np.flatnonzero(self.rows_dirty)
+        self.rows_dirty[:] = False
+        if not len(idx):
+            return
+        full = self.cells[idx].all(axis=2)
+        cleared = full.sum(axis=1)
+        hit = cleared > 0
+        idx, full, cleared = idx[hit], full[hit], cleared[hit]
+        if not len(idx):
+            return
+        self.rows_cleared[idx] += cleared
+        self.total_rows_cleared[idx] += cleared
+        payout = self.rewards[np.minimum(cleared, len(self.rewards)) - 1]
+        self.current_score[idx] += payout * (self.current_level[idx] + 1)
+
+        # full rows sort to the top, kept rows keep their order underneath
+        order = np.argsort(~full, axis=1, kind='stable')
+        boards = np.take_along_axis(self.cells[idx], order[:, :, None], axis=1)
+        boards[np.arange(self.height)[None, :] < cleared[:, None]] = 0
+        self.cells[idx] = boards
+
+    def check_level(self):
+        up = self.rows_cleared >= 10
+        if not up.any():
+            return
+        self.current_level[up] += 1
+        self.rows_cleared[up] = 0
+        self.slow_tick_interval[up] = np.maximum(1, self.slow_tick_interval[up] - 2)
+        level = self.current_level
+        self.slow_tick_interval[up & (level <= 8)] -= 5
+        self.slow_tick_interval[up & (level > 8) & (level <= 12)] -= 2
+        self.slow_tick_interval[up & (level > 12) & (level <= 15)] -= 1
+
+    def step(self, actions) -> tuple:
+        """
+        advance every board one tick.  actions is an (n,) array of the same
+        LEFT/RIGHT/UP/DOWN bits GameCore.step takes
+        :return: (rewards, dones), the score gained this tick and which boards
+                 topped out and were reset
+        """
+        actions = np.asarray(actions)
+        previous_score = self.current_score.copy()
+
+        self.process_completed_rows()
+        self.check_level()
+
+        down = (actions & DOWN) != 0
+        dropping = down & ~self.fast_drop_locked
+        soft_drop = dropping & (self.ticks_since_last_fall >= Conf.fast_fall_frames_interval)
+        if soft_drop.any():
+            self._maybe_fall(soft_drop)
+        self.fast_drop_active[dropping] = True
+        self.fast_drop_locked[~down] = False
+        self.fast_drop_active[~down] = False
+
+        alive = ~self.game_over
+        self._shift(alive & ((actions & UP) != 0), drotation=1)
+        # a blocked shift leaves the piece where it was, so later repeats
+        # are blocked too and need no separate stop
+        for bit, repeats, dgx in ((LEFT, LEFT_REPEATS, -1), (RIGHT, RIGHT_REPEATS, 1)):
+            shifts = np.where((actions & bit) != 0, 1 + (actions >> repeats & REPEAT_MASK), 0)
+            for repeat in range(int(shifts.max(initial=0))):
+                self._shift(alive & (shifts > repeat), dgx=dgx)
+        self._maybe_fall(alive)
+        self.ticks_since_last_fall += 1
+        self.ticks += 1
+
+        rewards = self.current_score - previous_score
+        dones = self.game_over.copy()
+        self.reset(dones)
+        return rewards, dones
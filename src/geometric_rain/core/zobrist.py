@@ -0,0 +1,122 @@
+from random import Random
+from collections import OrderedDict
+from geometric_rain.config import Conf
+
+
+# every table is drawn from the same seed, so a board hashes the same in
+# every process and every run
+SEED = 0x5eed_2b0a
+
+
+class Zobrist:
+    """
+    64-bit zobrist keys for cell occupancy, one random key per (gx, gy),
+    and a board's hash is the xor of the keys of its filled cells.  a row's
+    share of that is looked up a byte of the row mask at a time, so
+    updating the hash when a row changes costs a few table lookups however
+    many cells changed
+    """
+
+    def __init__(self, width: int = None, height: int = None):
+        self.width: int = width or Conf.grid_width
+        self.height: int = height or Conf.grid_height
+        rng = Random(SEED)
+        cell_keys = [[rng.getrandbits(64) for _ in range(self.width)] for _ in range(self.height)]
+        self.byte_keys: list = []
+        for gy in range(self.height):
+            tables = []
+            for first in range(0, self.width, 8):
+                keys = cell_keys[gy][first:first + 8]
+                table = [0] * 256
+                for value in range(1, 256):
+                    low = value & -value
+                    bit = low.bit_length() - 1
+                    table[value] = table[value ^ low] ^ (keys[bit] if bit < len(keys) else 0)
+                tables.append(table)
+            self.byte_keys.append(tables)
+
+    def row_key(self, gy: int, mask: int) -> int:
+        key = 0
+        for table in self.byte_keys[gy]:
+            key ^= table[mask & 0xff]
+            mask >>= 8
+        return key
+
+    def hash_rows(self, rows: list) -> int:
+        key = 0
+        for gy, mask in enumerate(rows):
+            if mask:
+                key ^= self.row_key(gy, mask)
+        return key
+
+    def update(self, key: int, before: list, after: list, gys) -> int:
+        """
+        the hash of after, given before's hash and the rows that differ
+        :return:
+        """
+        row_key = self.row_key
+        for gy in gys:
+            if before[gy] != after[gy]:
+                key ^= row_key(gy, before[gy]) ^ row_key(gy, after[gy])
+        return key
+
+
+_tables: dict = {}
+
+
+def zobrist_for(width: int, height: int) -> Zobrist:
+    table = _tables.get((width, height))
+    if table is None:
+        table = _tables[(width, height)] = Zobrist(width, height)
+    return table
+
+
+class TranspositionTable:
+    """
+    bounded LRU of search results keyed by board hash, plus whatever else
+    the result depends on (the piece, where it starts).  counts hits and
+    misses like TextCache does
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries: int = max_entries or Conf.transposition_table_size
+        self.entries = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
@@ -1,9 +1,29 @@
+import argparse
 from geometric_rain.classes.engine import Engine
+from geometric_rain.config import Conf
 
 
 game_name = "GeometricRain"
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=game_name)
+    parser.add_argument('--profile', action='store_true',
+                        help='time each phase of the frame; F3 shows the timings, '
+                             'and a chrome trace is written on exit')
+    parser.add_argument('--autoplay', action='store_true',
+                        help='let the placement search play')
+    parser.add_argument('--record', nargs='?', const=Conf.capture_mode, metavar='MODE',
+                        help='capture every frame to Conf.capture_path as raw, png or pipe '
+                             f'(default {Conf.capture_mode})')
+    args = parser.parse_args()
+    if args.profile:
+        Conf.profiling = True
+    if args.autoplay:
+        Conf.autoplay = True
+    if args.record:
+        Conf.capture = True
+        Conf.capture_mode = args.record
+
     game = Engine(game_name)
     game.run()
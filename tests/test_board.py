@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from geometric_rain.core.game import make_board
+
+
+@pytest.mark.parametrize('width', [10, 63, 64, 65, 70])
+def test_backends_agree_on_wide_boards(width):
+    boards = [make_board(backend, width, 20) for backend in ('numpy', 'bitboard')]
+    for board in boards:
+        board.place([(gx, gy) for gy in range(15, 20) for gx in range(width) if gx != gy], (1, 2, 3))
+        board.place([(0, 3), (width - 1, 3)], (4, 5, 6))
+    numpy_board, bitboard = boards
+    assert numpy_board.occupancy() == bitboard.occupancy()
+    assert numpy_board.row_mask(3) == bitboard.occupancy()[3] == 1 | 1 << width - 1
+    assert numpy_board.hash == bitboard.hash
+    for board in boards:
+        board.clear_rows([16, 18])
+    assert numpy_board.occupancy() == bitboard.occupancy()
+    assert numpy_board.hash == bitboard.hash
@@ -0,0 +1,21 @@
+from geometric_rain.core.lookahead import BeamPlanner, pack_rows, unpack_rows
+from geometric_rain.core.pieces import registry
+
+
+def test_rows_pack_at_any_width():
+    rows = [0, 1, 1 << 69 | 5, (1 << 64) - 1]
+    assert unpack_rows(pack_rows(rows, 70), 70) == rows
+    assert unpack_rows(pack_rows([1023, 0], 10), 10) == [1023, 0]
+
+
+def test_pool_expands_boards_wider_than_64_columns():
+    width = 70
+    rows = [0] * 18 + [(1 << width) - 1 ^ 1 << 5] * 2
+    piece_type, next_type = registry.pieces[:2]
+    planner = BeamPlanner(beam_width=2, workers=1, time_budget=60)
+    try:
+        lookahead = planner.submit(rows, width, piece_type, next_type, (0, piece_type.spawn_x, 0))
+        assert planner.collect(lookahead) is not None
+        assert planner.expanded == 2 and planner.timed_out == 0
+    finally:
+        planner.shutdown()
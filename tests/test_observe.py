@@ -0,0 +1,46 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pygame = pytest.importorskip('pygame')
+
+from geometric_rain.classes.display import Display
+from geometric_rain.classes.game import Game
+from geometric_rain.classes.scores import Scorekeeper
+
+
+class Silent:
+    music_state = 'off'
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+@pytest.fixture
+def game(tmp_path):
+    # pygame stays up between tests: fonts are cached for the whole process
+    pygame.init()
+    scorekeeper = Scorekeeper('GeometricRainTest', appdata_path=str(tmp_path))
+    return Game(Display(scorekeeper), Silent(), scorekeeper)
+
+
+def test_pixels_outlive_render(game):
+    game.render()
+    observation = game.observe(pixels=True)
+    pixels = observation['pixels']
+    assert not game.game_area.get_locked()
+    for _ in range(3):
+        game.update()
+        game.render()
+    assert pixels.shape == (game.board.height, game.board.width, 3)
+    assert not pixels.flags.writeable
+
+
+def test_pixels_follow_the_board(game):
+    game.board.place([(gx, game.board.height - 1) for gx in range(3)], (200, 10, 10))
+    game.rebuild_settled_layer()
+    game.render()
+    pixels = game.observe(pixels=True)['pixels']
+    background = np.array(game.display.game_panel.background_color[:3])
+    drawn = (pixels != background).any(axis=2)
+    assert drawn[-1, :3].all()
+    assert not drawn[-1, 3:].any()
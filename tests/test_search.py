@@ -0,0 +1,28 @@
+import pytest
+
+from geometric_rain.core.game import GameCore, make_board
+from geometric_rain.core.search import Autoplayer, PlacementSearch
+from geometric_rain.core.pieces import registry
+
+
+@pytest.mark.parametrize('width, height', [(10, 140), (70, 20)])
+def test_search_on_large_grids(width, height):
+    search = PlacementSearch()
+    rows = [0] * (height - 1) + [(1 << width) - 1 ^ 1]
+    piece_type = registry.pieces[0]
+    start = (0, piece_type.spawn_x, 0)
+    found = search.placements(rows, width, piece_type, start)
+    cached = search.placements(rows, width, piece_type, start)
+    assert search.placement_cache.hits == 1
+    assert [(placement.state, placement.score) for placement in cached] == \
+           [(placement.state, placement.score) for placement in found]
+    # pieces rest at the bottom, on the tall grid below any row a byte holds
+    assert search.best(rows, width, piece_type, start).state[2] >= height - 5
+
+
+def test_autoplayer_on_a_tall_grid():
+    core = GameCore(seed=1, board=make_board('bitboard', 10, 140))
+    autoplayer = Autoplayer()
+    while core.ticks < 2000 and not core.game_over:
+        core.step(autoplayer(core))
+    assert sum(core.score.stats.values()) > 1